@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Build the tileset and every manifest-driven sprite atlas in one command.
+
+By default the extractors run back to back in this process, so Pillow, NumPy
+and the manifest module are imported once. With --parallel each extractor
+runs in its own worker process instead; their logs are printed in order once
+all of them have finished.
+
+Flags apply to every extractor that supports them:
+  --verify    Verify extraction by comparing pixels against source
+  --fuzzy     With --verify, compare pHash distance instead of exact pixels
+  --preview   Generate labeled preview PNGs
+  --final     Save the spritesheets with maximum PNG compression (for commits)
+  --optimize-png  Save indexed (palette) PNGs when that is lossless
+  --quiet     Don't list each extracted tile or sprite
+  --parallel  Run the extractors concurrently in separate processes
+"""
+
+import io
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+
+from extract_utils import sprite_arg_parser
+from extract_tileset import extract_tiles
+from extract_npc_sprites import extract_npcs
+from extract_player_sprites import extract_players
+from extract_object_sprites import extract_objects
+
+EXTRACTORS = {
+    "tileset": extract_tiles,
+    "npcs": extract_npcs,
+    "players": extract_players,
+    "objects": extract_objects,
+}
+
+
+def run_captured(name: str, args) -> tuple:
+    """Run one extractor in a worker process, returning (passed, log text)."""
+    buffer = io.StringIO()
+    with redirect_stdout(buffer):
+        passed = EXTRACTORS[name](args)
+    return passed, buffer.getvalue()
+
+
+def main(argv=None) -> None:
+    """Run every extractor; exit 1 if any verification fails."""
+    parser = sprite_arg_parser("Build the tileset and all sprite atlases from the Kenney manifest.")
+    parser.add_argument("--parallel", action="store_true", help="Run extractors in separate processes")
+    args = parser.parse_args(argv)
+
+    if args.parallel:
+        with ProcessPoolExecutor(max_workers=len(EXTRACTORS)) as pool:
+            futures = {name: pool.submit(run_captured, name, args) for name in EXTRACTORS}
+            results = {}
+            for name, future in futures.items():
+                passed, log = future.result()
+                sys.stdout.write(log)
+                results[name] = passed
+    else:
+        results = {name: extract(args) for name, extract in EXTRACTORS.items()}
+
+    failed = [name for name, passed in results.items() if not passed]
+    if failed:
+        print(f"\nVerification failed for: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,10 +6,12 @@ Extracts sprites from source sprite sheets and outputs packed atlas + Phaser JSO
 """
 
 import argparse
+import functools
 import json
 import math
 import os
 import shutil
+import subprocess
 import sys
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
@@ -20,6 +22,28 @@ except ImportError:
     print("Error: Pillow (PIL) is required. Install with: pip install Pillow")
     sys.exit(1)
 
+try:
+    import numpy as np
+except ImportError:
+    print("Error: NumPy is required. Install with: pip install numpy")
+    sys.exit(1)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Probe preview fonts once instead of raising OSError per sheet. This script
+# runs standalone from extract_assets/, without tools/ on the import path, so
+# it cannot use extract_utils.load_font; it also tries DejaVu first so Linux
+# builds get scalable labels instead of Pillow's default font
+_FONT_CANDIDATES = [
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/System/Library/Fonts/Helvetica.ttc",
+]
+_FONT_PATH = next((p for p in _FONT_CANDIDATES if os.path.exists(p)), None)
+
 
 # =============================================================================
 # Configuration Loading
@@ -31,8 +55,8 @@ def load_config(path: Path) -> Dict[str, Any]:
     if not path.exists():
         raise FileNotFoundError(f"Config file not found: {path}")
 
-    with open(path, "r", encoding="utf-8") as f:
-        config = json.load(f)
+    data = path.read_bytes()
+    config = orjson.loads(data) if orjson is not None else json.loads(data)
 
     # Validate required fields
     required = ["sheetName", "inputPath", "outputTileSize", "mode"]
@@ -78,36 +102,48 @@ def remove_gridlines(image: Image.Image, config: Dict[str, Any]) -> Image.Image:
     line_color = tuple(grid_config.get("color", [0, 0, 0, 255]))
     tolerance = grid_config.get("tolerance", 50)
 
-    # Work on a copy
-    result = image.copy()
-    pixels = result.load()
-    width, height = result.size
-
-    for y in range(height):
-        for x in range(width):
-            pixel = pixels[x, y]
-            # Check if pixel is close to grid line color
-            if (
-                len(pixel) >= 3
-                and color_distance(pixel[: len(line_color)], line_color) <= tolerance
-            ):
-                # Sample from left neighbor if available, else right
-                if x > 0:
-                    pixels[x, y] = pixels[x - 1, y]
-                elif x < width - 1:
-                    pixels[x, y] = pixels[x + 1, y]
-                # If still grid-like, try top neighbor
-                new_pixel = pixels[x, y]
-                if (
-                    color_distance(new_pixel[: len(line_color)], line_color)
-                    <= tolerance
-                ):
-                    if y > 0:
-                        pixels[x, y] = pixels[x, y - 1]
-                    elif y < height - 1:
-                        pixels[x, y] = pixels[x, y + 1]
-
-    return result
+    src = np.array(image)
+    if src.ndim != 3 or src.shape[2] < 3:
+        return image.copy()
+    height, width = src.shape[:2]
+
+    # Mask of pixels close to the grid line color (squared distance avoids sqrt)
+    channels = min(len(line_color), src.shape[2])
+    line_rgb = np.array(line_color[:channels], dtype=np.int32)
+    diff = src[..., :channels].astype(np.int32) - line_rgb
+    is_line = (diff * diff).sum(axis=-1) <= tolerance * tolerance
+
+    # A grid pixel takes its left neighbor, and since neighbors are replaced
+    # left-to-right, a run of grid pixels is filled from the last clean pixel
+    # to its left. Forward-fill those indices in one pass.
+    cols = np.arange(width)
+    fill_idx = np.maximum.accumulate(np.where(is_line, 0, cols), axis=1)
+    result = np.take_along_axis(src, fill_idx[..., np.newaxis], axis=1)
+
+    def still_line(pixel: np.ndarray) -> bool:
+        d = pixel[:channels].astype(np.int32) - line_rgb
+        return int((d * d).sum()) <= tolerance * tolerance
+
+    # Runs touching the left edge have no clean left neighbor: they sample the
+    # right neighbor / previous pixel, then fall back to the row above (or the
+    # unprocessed row below on the first row). These are rare, so walk them.
+    for y in np.flatnonzero(is_line[:, 0]):
+        run = width if is_line[y].all() else int(np.argmin(is_line[y]))
+        for x in range(run):
+            if x > 0:
+                pixel = result[y, x - 1]
+            elif width > 1:
+                pixel = src[y, 1]
+            else:
+                pixel = src[y, 0]
+            if still_line(pixel):
+                if y > 0:
+                    pixel = result[y - 1, x]
+                elif height > 1:
+                    pixel = src[1, x]
+            result[y, x] = pixel
+
+    return Image.fromarray(result)
 
 
 # =============================================================================
@@ -484,6 +520,17 @@ def generate_manifest(
     }
 
 
+@functools.lru_cache(maxsize=None)
+def load_preview_font(size: int = 8) -> ImageFont.ImageFont:
+    """Load the preview label font, shared across all sheets."""
+    if _FONT_PATH:
+        try:
+            return ImageFont.truetype(_FONT_PATH, size)
+        except OSError:
+            pass
+    return ImageFont.load_default()
+
+
 def generate_preview(tiles: List[Dict[str, Any]], cols: int = 16) -> Image.Image:
     """Generate contact sheet preview for QA with labels."""
     if not tiles:
@@ -507,14 +554,13 @@ def generate_preview(tiles: List[Dict[str, Any]], cols: int = 16) -> Image.Image
     preview = Image.new("RGBA", (preview_width, preview_height), (50, 50, 50, 255))
     draw = ImageDraw.Draw(preview)
 
-    # Try to load a font, fall back to default
-    try:
-        font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 8)
-    except (OSError, IOError):
-        try:
-            font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 8)
-        except (OSError, IOError):
-            font = ImageFont.load_default()
+    font = load_preview_font(8)
+
+    # Truncate labels up front rather than inside the drawing loop
+    labels = [
+        t["name"][:8] + ".." if len(t["name"]) > 10 else t["name"]
+        for t in sorted_tiles
+    ]
 
     for i, tile in enumerate(sorted_tiles):
         col = i % cols
@@ -530,13 +576,9 @@ def generate_preview(tiles: List[Dict[str, Any]], cols: int = 16) -> Image.Image
         # Paste tile
         preview.paste(tile["image"], (tx, ty), tile["image"])
 
-        # Draw label (truncate if too long)
-        label = tile["name"]
-        if len(label) > 10:
-            label = label[:8] + ".."
-
+        # Draw label
         label_y = y + tile["height"] + 1
-        draw.text((x + 2, label_y), label, fill=(200, 200, 200, 255), font=font)
+        draw.text((x + 2, label_y), labels[i], fill=(200, 200, 200, 255), font=font)
 
     return preview
 
@@ -546,12 +588,31 @@ def generate_preview(tiles: List[Dict[str, Any]], cols: int = 16) -> Image.Image
 # =============================================================================
 
 
+def publish_file(src: Path, dst: Path, link: bool = False) -> bool:
+    """Publish a build artifact to dst, returning True if it was hardlinked.
+
+    Uses copyfile (no metadata copy, kernel zero-copy on Linux). With link,
+    hardlinks instead when src and dst share a filesystem. An existing dst
+    is removed first, so a link left by an earlier --link run is broken
+    rather than copied onto itself.
+    """
+    if dst.exists():
+        dst.unlink()
+    if link and os.stat(src).st_dev == os.stat(dst.parent).st_dev:
+        os.link(src, dst)
+        return True
+    shutil.copyfile(src, dst)
+    return False
+
+
 def process_sheet(
     sheet_name: str,
     config_dir: Path,
     src_dir: Path,
     out_dir: Path,
     public_out_dir: Optional[Path] = None,
+    pretty_atlas: bool = False,
+    link: bool = False,
 ) -> bool:
     """Process a single sprite sheet."""
     print(f"\n{'=' * 60}")
@@ -573,7 +634,11 @@ def process_sheet(
         return False
 
     print(f"Loading source: {input_path}")
-    image = Image.open(input_path).convert("RGBA")
+    # Decode once up front; crops and tile extraction then work from memory
+    image = Image.open(input_path)
+    image.load()
+    if image.mode != "RGBA":
+        image = image.convert("RGBA")
     print(f"Source size: {image.size}")
 
     # Apply crop if specified
@@ -625,7 +690,11 @@ def process_sheet(
     phaser_json = generate_phaser_json(frames, atlas.size[0], "packed.png")
     json_path = sheet_out_dir / "packed.json"
     with open(json_path, "w", encoding="utf-8") as f:
-        json.dump(phaser_json, f, indent=2, sort_keys=True)
+        # Compact by default: this file is parsed by Phaser at runtime
+        if pretty_atlas:
+            json.dump(phaser_json, f, indent=2, sort_keys=True)
+        else:
+            json.dump(phaser_json, f, separators=(",", ":"), sort_keys=True)
     print(f"Saved Phaser JSON: {json_path}")
 
     # Generate and save manifest
@@ -647,14 +716,38 @@ def process_sheet(
         public_sheet_dir.mkdir(parents=True, exist_ok=True)
 
         # Copy atlas and JSON to public
-        shutil.copy(atlas_path, public_sheet_dir / "packed.png")
-        shutil.copy(json_path, public_sheet_dir / "packed.json")
-        print(f"Copied to public: {public_sheet_dir}")
+        linked = publish_file(atlas_path, public_sheet_dir / "packed.png", link)
+        linked &= publish_file(json_path, public_sheet_dir / "packed.json", link)
+        print(f"{'Linked' if linked else 'Copied'} to public: {public_sheet_dir}")
 
     print(f"Successfully processed {sheet_name}")
     return True
 
 
+def optimize_pngs(sheet_dirs: List[Path]) -> bool:
+    """Losslessly recompress PNGs in the given directories with oxipng.
+
+    A single oxipng invocation handles every file and parallelizes internally.
+    """
+    oxipng = shutil.which("oxipng")
+    if oxipng is None:
+        print("Warning: oxipng not found on PATH, skipping PNG optimization")
+        return False
+
+    dirs = [str(d) for d in sheet_dirs if d.exists()]
+    if not dirs:
+        return True
+
+    print(f"Optimizing PNGs with oxipng ({len(dirs)} directories)")
+    result = subprocess.run(
+        [oxipng, "-o", "2", "--strip", "safe", "-r", "-q", *dirs], check=False
+    )
+    if result.returncode != 0:
+        print(f"Warning: oxipng exited with status {result.returncode}")
+        return False
+    return True
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Extract sprites from source sheets for Phaser 3 games."
@@ -696,6 +789,21 @@ def main():
     parser.add_argument(
         "--clean", action="store_true", help="Remove existing outputs before processing"
     )
+    parser.add_argument(
+        "--pretty-atlas",
+        action="store_true",
+        help="Indent packed.json for human diffing (default: compact)",
+    )
+    parser.add_argument(
+        "--link",
+        action="store_true",
+        help="Hardlink atlas files into the public dir instead of copying (same filesystem only)",
+    )
+    parser.add_argument(
+        "--optimize",
+        action="store_true",
+        help="Recompress output PNGs with oxipng after processing (requires oxipng on PATH)",
+    )
 
     args = parser.parse_args()
 
@@ -754,13 +862,28 @@ def main():
     # Process each sheet
     success_count = 0
     fail_count = 0
+    processed_dirs = []
 
     for sheet in sheets_to_process:
-        if process_sheet(sheet, config_dir, src_dir, out_dir, public_out_dir):
+        if process_sheet(
+            sheet,
+            config_dir,
+            src_dir,
+            out_dir,
+            public_out_dir,
+            pretty_atlas=args.pretty_atlas,
+            link=args.link,
+        ):
             success_count += 1
+            processed_dirs.append(out_dir / sheet)
+            if public_out_dir:
+                processed_dirs.append(public_out_dir / sheet)
         else:
             fail_count += 1
 
+    if args.optimize and processed_dirs:
+        optimize_pngs(processed_dirs)
+
     # Summary
     print(f"\n{'=' * 60}")
     print(f"SUMMARY: {success_count} succeeded, {fail_count} failed")
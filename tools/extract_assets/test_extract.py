@@ -0,0 +1,40 @@
+"""Tests for publishing build artifacts to the public directory."""
+
+import os
+from pathlib import Path
+
+from extract import publish_file
+
+
+def _build(tmp_path: Path) -> tuple:
+    build_dir = tmp_path / "build"
+    public_dir = tmp_path / "public"
+    build_dir.mkdir()
+    public_dir.mkdir()
+    src = build_dir / "packed.png"
+    src.write_bytes(b"atlas-v1")
+    return src, public_dir / "packed.png"
+
+
+def test_publish_link_then_copy(tmp_path):
+    src, dst = _build(tmp_path)
+
+    assert publish_file(src, dst, link=True)
+    assert os.path.samefile(src, dst)
+
+    # A plain run after --link must replace the hardlink with a real copy
+    assert not publish_file(src, dst)
+    assert not os.path.samefile(src, dst)
+    assert dst.read_bytes() == b"atlas-v1"
+
+    # Rebuilding the source no longer rewrites the published file
+    src.write_bytes(b"atlas-v2")
+    assert dst.read_bytes() == b"atlas-v1"
+
+
+def test_publish_copy_then_link(tmp_path):
+    src, dst = _build(tmp_path)
+
+    assert not publish_file(src, dst)
+    assert publish_file(src, dst, link=True)
+    assert os.path.samefile(src, dst)
@@ -2,89 +2,34 @@
 """Extract NPC sprites from Kenney Roguelike Characters Pack using manifest.
 
 Flags:
-  --verify   Verify extraction by comparing pHash against source
+  --verify   Verify extraction by comparing pixels against source
+  --fuzzy    With --verify, compare pHash distance instead of exact pixels
   --preview  Generate labeled preview PNG
+  --final    Save the spritesheet with maximum PNG compression (for commits)
+  --optimize-png  Save as an indexed (palette) PNG when that is lossless
+  --quiet    Don't list each extracted sprite
 """
 
-import argparse
-import os
 import sys
 
-from PIL import Image
+from extract_utils import sprite_arg_parser, extract_character_sprites
 
-from extract_utils import load_manifest, get_tile, verify_sprites, generate_sprite_preview
 
+def describe_npc(npc: dict) -> str:
+    """Return the log line suffix for an NPC."""
+    return f"Zone: {npc.get('zone', 'Unknown')}"
 
-def main() -> None:
-    """Extract NPC sprites from manifest and save as spritesheet with atlas JSON."""
-    import json
-
-    parser = argparse.ArgumentParser(description="Extract NPC sprites from Kenney characters pack.")
-    parser.add_argument("--verify", action="store_true", help="Verify extraction accuracy")
-    parser.add_argument("--preview", action="store_true", help="Generate labeled preview PNG")
-    args = parser.parse_args()
-
-    manifest = load_manifest()
-    char_source = manifest["sources"]["characters"]
-    npcs_config = manifest["npcs"]["sprites"]
-    output_config = manifest["outputs"]["npcs"]
-
-    source_img = Image.open(char_source["path"])
-    tile_size = char_source["tileSize"]
-    spacing = char_source["spacing"]
-    print(f"Source spritesheet size: {source_img.size}")
-
-    num_npcs = len(npcs_config)
-    output_width = num_npcs * tile_size
-    output_height = tile_size
-
-    output_img = Image.new("RGBA", (output_width, output_height), (0, 0, 0, 0))
-    frames = {}
 
-    for idx, npc in enumerate(npcs_config):
-        npc_id = npc["id"]
-        base = npc["base"]
-        col, row = base["col"], base["row"]
+def extract_npcs(args) -> bool:
+    """Extract NPC sprites and save as spritesheet with atlas JSON."""
+    return extract_character_sprites("npcs", "NPC", describe_npc, args)
 
-        tile = get_tile(source_img, col, row, tile_size, spacing)
-        out_x = idx * tile_size
-        output_img.paste(tile, (out_x, 0))
 
-        frames[npc_id] = {
-            "frame": {"x": out_x, "y": 0, "w": tile_size, "h": tile_size},
-            "sourceSize": {"w": tile_size, "h": tile_size},
-            "spriteSourceSize": {"x": 0, "y": 0, "w": tile_size, "h": tile_size},
-        }
-        zone = npc.get("zone", "Unknown")
-        print(f"NPC {npc_id:20s}: ({col:2d},{row:2d}) -> x={out_x:3d} | Zone: {zone}")
-
-    os.makedirs(os.path.dirname(output_config["pngPath"]) or ".", exist_ok=True)
-    output_img.save(output_config["pngPath"])
-    print(f"\nSaved NPC spritesheet to {output_config['pngPath']}")
-    print(f"Output size: {output_img.size}")
-
-    atlas_json = {
-        "frames": frames,
-        "meta": {
-            "image": "npcs.png",
-            "size": {"w": output_width, "h": output_height},
-            "scale": 1,
-            "format": "RGBA8888",
-        },
-    }
-
-    with open(output_config["jsonPath"], "w") as f:
-        json.dump(atlas_json, f, indent=2)
-    print(f"Saved NPC atlas JSON to {output_config['jsonPath']}")
-    print(f"Manifest version: {manifest['version']}")
-
-    if args.verify:
-        if not verify_sprites(output_img, npcs_config, source_img, tile_size, spacing, label="NPC sprites"):
-            sys.exit(1)
-
-    if args.preview:
-        preview_path = output_config["pngPath"].replace(".png", "_preview.png")
-        generate_sprite_preview(output_img, npcs_config, tile_size, preview_path)
+def main(argv=None) -> None:
+    """Extract NPC sprites from manifest and save as spritesheet with atlas JSON."""
+    parser = sprite_arg_parser("Extract NPC sprites from Kenney characters pack.")
+    if not extract_npcs(parser.parse_args(argv)):
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -5,169 +5,271 @@ Reads object definitions from kenney-curation.json instead of hardcoded arrays.
 Output: objects.png atlas + objects.json (Phaser atlas format)
 
 Flags:
-  --verify   Verify extraction by comparing pHash against source
+  --verify   Verify extraction by comparing pixels against source
+  --fuzzy    With --verify, compare pHash distance instead of exact pixels
   --preview  Generate labeled preview PNG
+  --final    Save the spritesheet with maximum PNG compression (for commits)
+  --optimize-png  Save as an indexed (palette) PNG when that is lossless
+  --quiet    Don't list each extracted object
 """
 
-import argparse
-import json
-import os
+import hashlib
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 
+import numpy as np
 from PIL import Image
 
-from extract_utils import load_manifest, get_tile, generate_sprite_preview
+from extract_utils import (
+    sprite_arg_parser,
+    load_manifest,
+    load_source,
+    write_json,
+    write_lines,
+    ensure_output_dirs,
+    existing_paths,
+    save_png,
+    crop_array,
+    tile_bounds,
+    morton_key,
+    blit_all,
+    generate_sprite_preview,
+    tiles_match,
+    batch_phash,
+    phash_distances,
+)
+
+
+@dataclass
+class ExtractedSprites:
+    """Extracted object sprites stored as parallel columns (structure of arrays).
+
+    Verification and preview only read a few columns each, so they iterate
+    those columns directly instead of fetching fields from per-object dicts.
+    """
+
+    ids: list
+    sources: list
+    col: np.ndarray
+    row: np.ndarray
+    out_x: np.ndarray
+    w: np.ndarray
+    h: np.ndarray
+
+    @classmethod
+    def allocate(cls, n: int) -> "ExtractedSprites":
+        """Create columns preallocated for n sprites."""
+        return cls(
+            ids=[None] * n,
+            sources=[None] * n,
+            col=np.empty(n, np.int32),
+            row=np.empty(n, np.int32),
+            out_x=np.empty(n, np.int32),
+            w=np.empty(n, np.int32),
+            h=np.empty(n, np.int32),
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
 
 
 def verify_extraction(
     output_img: Image.Image,
-    objects_extracted: list,
+    objects_extracted: ExtractedSprites,
     source_images: dict,
+    fuzzy: bool = False,
 ) -> bool:
-    """Verify each extracted object sprite against the source."""
-    try:
-        import imagehash
-    except ImportError:
-        print("Warning: imagehash not installed, skipping verification")
-        return True
+    """Verify each extracted object sprite against the source.
 
+    Sprites are compared byte-for-byte unless ``fuzzy`` is set, in which case
+    the pHash distance is used.
+    """
     print(f"\n{'=' * 60}")
     print("VERIFICATION: Object sprites")
     print(f"{'=' * 60}")
 
-    all_pass = True
-    for entry in objects_extracted:
-        obj_id = entry["id"]
-        out_x = entry["out_x"]
-        w = entry.get("w", 16)
-        h = entry.get("h", 16)
-
-        extracted = output_img.crop((out_x, 0, out_x + w, h))
-        h_ext = imagehash.phash(extracted)
-
-        source_name = entry["source"]
-        if source_name in source_images:
-            src = source_images[source_name]
-            src_ts = src["tileSize"]
-            obj_tw = w // src_ts if w > src_ts else 1
-            obj_th = h // src_ts if h > src_ts else 1
-            original = get_tile(
-                src["image"],
-                entry["col"], entry["row"],
-                tile_size=src_ts,
-                spacing=src["spacing"],
-                width=obj_tw, height=obj_th,
+    # Objects can share source regions; slice (and hash) each region once
+    output_arr = np.asarray(output_img)
+    orig_tiles: dict = {}
+    checks = []
+    columns = zip(
+        objects_extracted.ids,
+        objects_extracted.sources,
+        objects_extracted.col.tolist(),
+        objects_extracted.row.tolist(),
+        objects_extracted.out_x.tolist(),
+        objects_extracted.w.tolist(),
+        objects_extracted.h.tolist(),
+    )
+    for obj_id, source_name, col, row, out_x, w, h in columns:
+        if source_name not in source_images:
+            checks.append((obj_id, None, None))
+            continue
+
+        src = source_images[source_name]
+        src_ts = src["tileSize"]
+        obj_tw = w // src_ts if w > src_ts else 1
+        obj_th = h // src_ts if h > src_ts else 1
+        key = (source_name, col, row, obj_tw, obj_th)
+        if key not in orig_tiles:
+            orig_tiles[key] = crop_array(
+                src["arr"],
+                *tile_bounds(col, row, src_ts, src["spacing"], obj_tw, obj_th),
             )
-            h_orig = imagehash.phash(original)
-            dist = h_ext - h_orig
-            status = "PASS" if dist == 0 else f"FAIL(dist={dist})"
-            if dist > 0:
-                all_pass = False
-        else:
+        extracted = crop_array(output_arr, out_x, 0, w, h)
+        checks.append((obj_id, extracted, key))
+
+    if fuzzy:
+        keys = list(orig_tiles)
+        compared = [i for i, check in enumerate(checks) if check[2] is not None]
+        # Hash unique source regions and extracted tiles in one DCT pass
+        try:
+            hashes = batch_phash(
+                [orig_tiles[k] for k in keys] + [checks[i][1] for i in compared]
+            )
+        except ImportError:
+            print("Warning: scipy not installed, skipping verification")
+            return True
+        orig_hashes = dict(zip(keys, hashes[:len(keys)]))
+        ext_hashes = hashes[len(keys):]
+        ref_hashes = np.array([orig_hashes[checks[i][2]] for i in compared], dtype=bool)
+        dists = dict(zip(compared, phash_distances(ext_hashes, ref_hashes.reshape(-1, 64)).tolist()))
+
+    all_pass = True
+    report = []
+    for i, (obj_id, extracted, key) in enumerate(checks):
+        if key is None:
             status = "SKIP(no source)"
+        elif fuzzy:
+            dist = dists[i]
+            passed = dist == 0
+            status = "PASS" if passed else f"FAIL(dist={dist})"
+        else:
+            passed = tiles_match(extracted, orig_tiles[key])
+            status = "PASS" if passed else "FAIL(bytediff)"
+        if key is not None and not passed:
+            all_pass = False
 
-        print(f"  {obj_id:20s} {status}")
+        report.append(f"  {obj_id:20s} {status}")
 
+    write_lines(report)
     return all_pass
 
 
-def main():
-    parser = argparse.ArgumentParser(description="Extract object sprites from Kenney packs.")
-    parser.add_argument("--verify", action="store_true", help="Verify extraction accuracy")
-    parser.add_argument("--preview", action="store_true", help="Generate labeled preview PNG")
-    args = parser.parse_args()
+def extract_objects(args) -> bool:
+    """Extract object sprites and save as spritesheet with atlas JSON.
 
+    Returns False if --verify found mismatches, True otherwise.
+    """
     print("=== Extracting Object Sprites from Kenney Packs ===\n")
 
-    manifest = load_manifest()
+    manifest = load_manifest("sources", "objects", "outputs")
     sources_config = manifest["sources"]
     objects_config = manifest["objects"]["sprites"]
     output_config = manifest["outputs"]["objects"]
 
-    # Load source images
+    # Load source images concurrently (PNG decode releases the GIL)
+    present = existing_paths(info["path"] for info in sources_config.values())
+    available = {
+        name: info for name, info in sources_config.items() if info["path"] in present
+    }
+    with ThreadPoolExecutor() as pool:
+        loaded = dict(zip(available, pool.map(load_source, available.values())))
     source_images = {}
-    for source_name, source_info in sources_config.items():
-        path = source_info["path"]
-        if os.path.exists(path):
-            source_images[source_name] = {
-                "image": Image.open(path).convert("RGBA"),
-                "tileSize": source_info["tileSize"],
-                "spacing": source_info["spacing"],
-            }
-            print(f"Loaded {source_name}: {path} ({source_images[source_name]['image'].size})")
-
-    # Pre-compute output dimensions accounting for multi-tile objects
-    # Use source tileSize for each object rather than hardcoded value
-    total_width = 0
-    max_height = 0
+    for source_name, source in loaded.items():
+        source_images[source_name] = source
+        print(f"Loaded {source_name}: {available[source_name]['path']} ({source['image'].size})")
+
+    # Plan every placement and size the atlas in one pass over the manifest,
+    # so the blit loop is pure slice copies.
+    # Sprites with the same source region or identical pixels share one slot.
+    placements = []
+    slot_by_region = {}
+    slot_by_content = {}
+    out_x = 0
     for obj in objects_config:
         source_name = obj["source"]
-        src_ts = source_images[source_name]["tileSize"] if source_name in source_images else 16
-        obj_w = obj.get("width", 1) * src_ts
-        obj_h = obj.get("height", 1) * src_ts
-        total_width += obj_w
-        max_height = max(max_height, obj_h)
-
-    if max_height == 0:
-        max_height = 16
+        if source_name not in source_images:
+            print(f"  WARNING: Source '{source_name}' not found for {obj['id']}, skipping")
+            continue
 
-    output_width = total_width
-    output_height = max_height
+        src = source_images[source_name]
+        x, y, w, h = tile_bounds(
+            obj["col"], obj["row"], src["tileSize"], src["spacing"],
+            obj.get("width", 1), obj.get("height", 1),
+        )
+        region = (source_name, x, y, w, h)
+        dst_x = slot_by_region.get(region)
+        if dst_x is None:
+            pixels = src["arr"][y:y + h, x:x + w]
+            content_key = (pixels.shape, hashlib.blake2b(pixels.tobytes(), digest_size=16).digest())
+            dst_x = slot_by_content.get(content_key)
+            if dst_x is None:
+                dst_x = slot_by_content[content_key] = out_x
+                out_x += w
+                placements.append((obj, src["arr"], x, y, w, h, dst_x, True))
+                slot_by_region[region] = dst_x
+                continue
+            slot_by_region[region] = dst_x
+        placements.append((obj, src["arr"], x, y, w, h, dst_x, False))
+
+    # The atlas is exactly as wide as the slots handed out and as tall as the
+    # tallest sprite (spacing can make multi-tile sprites a pixel taller)
+    output_width = out_x
+    output_height = max((p[5] for p in placements), default=16)
+
+    # Blit in Z-order per source for locality; atlas slots are already fixed
+    blit_order = sorted(
+        (p for p in placements if p[7]),
+        key=lambda p: (p[0]["source"], morton_key(p[0]["row"], p[0]["col"])),
+    )
+    source_index = {name: i for i, name in enumerate(source_images)}
+    output_arr = np.zeros((output_height, output_width, 4), dtype=np.uint8)
+    if blit_order:
+        _, _, xs, ys, ws, hs, out_xs, _ = zip(*blit_order)
+        blit_all(
+            output_arr,
+            [src["arr"] for src in source_images.values()],
+            [source_index[p[0]["source"]] for p in blit_order],
+            xs, ys, ws, hs, out_xs,
+        )
 
-    output_img = Image.new("RGBA", (output_width, output_height), (0, 0, 0, 0))
     frames = {}
-    objects_extracted = []
-    out_x = 0
-
-    for obj in objects_config:
+    log_lines = []
+    objects_extracted = ExtractedSprites.allocate(len(placements))
+    for i, (obj, _, _, _, w, h, dst_x, unique) in enumerate(placements):
         obj_id = obj["id"]
-        source_name = obj["source"]
-        col = obj["col"]
-        row = obj["row"]
+        col, row = obj["col"], obj["row"]
         obj_tw = obj.get("width", 1)
         obj_th = obj.get("height", 1)
-        desc = obj.get("description", "")
 
-        if source_name not in source_images:
-            print(f"  WARNING: Source '{source_name}' not found for {obj_id}, skipping")
-            continue
+        frames[obj_id] = {
+            "frame": {"x": dst_x, "y": 0, "w": w, "h": h},
+            "sourceSize": {"w": w, "h": h},
+            "spriteSourceSize": {"x": 0, "y": 0, "w": w, "h": h},
+        }
+
+        objects_extracted.ids[i] = obj_id
+        objects_extracted.sources[i] = obj["source"]
+        objects_extracted.col[i] = col
+        objects_extracted.row[i] = row
+        objects_extracted.out_x[i] = dst_x
+        objects_extracted.w[i] = w
+        objects_extracted.h[i] = h
+
+        size_str = f"{obj_tw}x{obj_th}" if obj_tw > 1 or obj_th > 1 else "1x1"
+        desc = obj.get("description", "")
+        shared = "" if unique else " (shared)"
+        log_lines.append(f"  {obj_id:15s}: ({col:2d},{row:2d}) {size_str:>3s} from {obj['source']:10s} -> x={dst_x}{shared} | {desc}")
 
-        src = source_images[source_name]
-        src_ts = src["tileSize"]
-        try:
-            sprite = get_tile(
-                src["image"], col, row, src_ts, src["spacing"],
-                width=obj_tw, height=obj_th,
-            )
-            w = sprite.width
-            h = sprite.height
-            output_img.paste(sprite, (out_x, 0))
-
-            frames[obj_id] = {
-                "frame": {"x": out_x, "y": 0, "w": w, "h": h},
-                "sourceSize": {"w": w, "h": h},
-                "spriteSourceSize": {"x": 0, "y": 0, "w": w, "h": h},
-            }
-
-            objects_extracted.append({
-                "id": obj_id,
-                "source": source_name,
-                "col": col,
-                "row": row,
-                "out_x": out_x,
-                "w": w,
-                "h": h,
-            })
-
-            size_str = f"{obj_tw}x{obj_th}" if obj_tw > 1 or obj_th > 1 else "1x1"
-            print(f"  {obj_id:15s}: ({col:2d},{row:2d}) {size_str:>3s} from {source_name:10s} -> x={out_x} | {desc}")
-            out_x += w
-        except Exception as e:
-            print(f"  WARNING: Failed to extract {obj_id}: {e}")
+    if not args.quiet:
+        write_lines(log_lines)
 
     # Save output
-    os.makedirs(os.path.dirname(output_config["pngPath"]) or ".", exist_ok=True)
-    output_img.save(output_config["pngPath"])
+    output_img = Image.fromarray(output_arr)
+    ensure_output_dirs(output_config["pngPath"], output_config["jsonPath"])
+    save_png(output_img, output_config["pngPath"], final=args.final, palette=args.optimize_png)
     print(f"\nSaved object spritesheet to {output_config['pngPath']}")
     print(f"Output size: {output_img.size} ({len(frames)} objects)")
 
@@ -181,8 +283,7 @@ def main():
         },
     }
 
-    with open(output_config["jsonPath"], "w") as f:
-        json.dump(atlas_json, f, indent=2)
+    write_json(output_config["jsonPath"], atlas_json)
     print(f"Saved object atlas JSON to {output_config['jsonPath']}")
 
     print("\n=== Object Atlas Summary ===")
@@ -190,18 +291,29 @@ def main():
     for obj_id in frames:
         print(f"  - {obj_id}")
 
+    passed = True
     if args.verify:
-        if not verify_extraction(output_img, objects_extracted, source_images):
-            sys.exit(1)
+        passed = verify_extraction(output_img, objects_extracted, source_images, fuzzy=args.fuzzy)
 
     if args.preview:
         preview_path = output_config["pngPath"].replace(".png", "_preview.png")
         generate_sprite_preview(
-            output_img, objects_extracted, 16, preview_path,
-            get_out_x=lambda item, idx: item["out_x"],
-            get_dimensions=lambda item: (item.get("w", 16), item.get("h", 16)),
+            output_img, objects_extracted.ids, 16, preview_path,
+            get_out_x=lambda item, idx: int(objects_extracted.out_x[idx]),
+            get_dimensions=lambda item, idx: (
+                int(objects_extracted.w[idx]),
+                int(objects_extracted.h[idx]),
+            ),
         )
 
+    return passed
+
+
+def main(argv=None) -> None:
+    parser = sprite_arg_parser("Extract object sprites from Kenney packs.", "object")
+    if not extract_objects(parser.parse_args(argv)):
+        sys.exit(1)
+
 
 if __name__ == "__main__":
     main()
@@ -6,18 +6,70 @@ Reads tile definitions from kenney-curation.json and creates the game tileset.
 Output: 128x64 tileset (8x4 tiles at 16x16)
 
 Flags:
-  --verify   After extraction, compare each tile's pHash against the source to validate accuracy
+  --verify   After extraction, compare each tile's pixels against the source to validate accuracy
   --preview  Generate a labeled preview PNG alongside the tileset
+  --final    Save the tileset with maximum PNG compression (for commits)
+  --optimize-png  Save as an indexed (palette) PNG when that is lossless
+  --quiet    Don't list each extracted tile
 """
 
-import argparse
-import json
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
+from types import SimpleNamespace
+from typing import Optional
+
+import numpy as np
+from PIL import Image, UnidentifiedImageError
+
+from extract_utils import (
+    load_manifest,
+    load_source,
+    load_font,
+    write_lines,
+    save_png,
+    get_tile_array,
+    blit_all,
+    blit_over,
+    batch_phash,
+    phash_distances,
+)
+
+
+def load_required_source(source_info: dict) -> dict:
+    """Load a source spritesheet, raising FileNotFoundError if it can't be read."""
+    try:
+        return load_source(source_info)
+    except (FileNotFoundError, UnidentifiedImageError) as e:
+        raise FileNotFoundError(f"Source not found: {source_info['path']}") from e
+
+
+def validate_slots(tiles_config: list, src_idx: np.ndarray, indices: np.ndarray, slot_count: int) -> None:
+    """Check every tile's source and output slot in one pass over the columns.
+
+    ``src_idx`` is -1 for tiles whose source isn't loaded. Raises RuntimeError
+    naming the first offending tile.
+    """
+    unloaded = np.flatnonzero(src_idx < 0)
+    if unloaded.size:
+        tile_def = tiles_config[unloaded[0]]
+        raise RuntimeError(
+            f"Source '{tile_def['source']}' not loaded for tile '{tile_def['id']}'"
+        )
 
-from PIL import Image
+    out_of_range = np.flatnonzero((indices < 0) | (indices >= slot_count))
+    if out_of_range.size:
+        tile_def = tiles_config[out_of_range[0]]
+        raise RuntimeError(
+            f"Tile '{tile_def['id']}' index {tile_def['index']} is outside the {slot_count}-slot tileset"
+        )
 
-from extract_utils import load_manifest, get_tile
+    slots, counts = np.unique(indices, return_counts=True)
+    if (counts > 1).any():
+        slot = int(slots[counts > 1][0])
+        ids = [tiles_config[i]["id"] for i in np.flatnonzero(indices == slot)]
+        raise RuntimeError(f"Tileset index {slot} is used by more than one tile: {', '.join(ids)}")
 
 
 def verify_extraction(
@@ -26,17 +78,16 @@ def verify_extraction(
     source_images: dict,
     output_config: dict,
 ) -> bool:
-    """Verify extracted tileset by comparing pHash of each tile against source."""
-    try:
-        import imagehash
-    except ImportError:
-        print("Warning: imagehash not installed, skipping verification")
-        print("Install with: pip install imagehash")
-        return True
+    """Verify extracted tileset by comparing each tile's pixels against source.
 
+    Extraction is a straight copy, so tiles are compared byte-for-byte; pHash
+    distance is only computed for tiles that differ, to report how far off they are.
+    """
     tile_size = output_config["tileSize"]
     columns = output_config["columns"]
+    tileset_arr = np.asarray(tileset)
     all_pass = True
+    report = []
 
     print(f"\n{'=' * 60}")
     print("VERIFICATION: Comparing extracted tiles against sources")
@@ -46,38 +97,38 @@ def verify_extraction(
         tile_id = tile_def["id"]
         tile_index = tile_def["index"]
         source_name = tile_def["source"]
-        col = tile_def["col"]
-        row = tile_def["row"]
 
-        out_col = tile_index % columns
-        out_row = tile_index // columns
-        out_x = out_col * tile_size
-        out_y = out_row * tile_size
-
-        # Extract from output tileset
-        extracted = tileset.crop((out_x, out_y, out_x + tile_size, out_y + tile_size))
-
-        # Extract from source
-        if source_name in source_images:
-            source = source_images[source_name]
-            original = get_tile(
-                source["image"],
-                col, row,
-                tile_size=source["tileSize"],
-                spacing=source["spacing"],
-            )
-
-            h_extracted = imagehash.phash(extracted)
-            h_original = imagehash.phash(original)
-            dist = h_extracted - h_original
-
-            status = "PASS" if dist == 0 else f"WARN(dist={dist})"
-            if dist > 3:
-                status = f"FAIL(dist={dist})"
+        if source_name not in source_images:
+            continue
+
+        out_x = tile_index % columns * tile_size
+        out_y = tile_index // columns * tile_size
+        source = source_images[source_name]
+        original = get_tile_array(
+            source["arr"],
+            tile_def["col"], tile_def["row"],
+            tile_size=source["tileSize"],
+            spacing=source["spacing"],
+        )
+        h, w = original.shape[:2]
+        extracted = tileset_arr[out_y:out_y + h, out_x:out_x + w]
+
+        if extracted.shape == original.shape and np.array_equal(extracted, original):
+            status = "PASS"
+        else:
+            dist = phash_distance(extracted, original)
+            if dist is None:
+                status = "FAIL(bytediff)"
                 all_pass = False
+            else:
+                status = f"WARN(dist={dist})"
+                if dist > 3:
+                    status = f"FAIL(dist={dist})"
+                    all_pass = False
 
-            print(f"  [{tile_index:2d}] {tile_id:20s} {status}")
+        report.append(f"  [{tile_index:2d}] {tile_id:20s} {status}")
 
+    write_lines(report)
     if all_pass:
         print("\nAll tiles verified successfully.")
     else:
@@ -86,6 +137,15 @@ def verify_extraction(
     return all_pass
 
 
+def phash_distance(a: np.ndarray, b: np.ndarray) -> Optional[int]:
+    """Return the pHash distance between two RGBA tiles, or None without scipy."""
+    try:
+        hashes = batch_phash([a, b])
+    except ImportError:
+        return None
+    return int(phash_distances(hashes[:1], hashes[1:])[0])
+
+
 def generate_preview(
     tileset: Image.Image,
     tiles_config: list,
@@ -93,7 +153,7 @@ def generate_preview(
     preview_path: str,
 ) -> None:
     """Generate a labeled preview PNG showing tile IDs over each slot."""
-    from PIL import ImageDraw, ImageFont
+    from PIL import ImageDraw
 
     tile_size = output_config["tileSize"]
     columns = output_config["columns"]
@@ -107,149 +167,179 @@ def generate_preview(
     preview_w = columns * tile_size * scale
     preview_h = rows_count * cell_h
 
-    preview = Image.new("RGBA", (preview_w, preview_h), (40, 40, 40, 255))
-    draw = ImageDraw.Draw(preview)
+    font = load_font(9)
 
-    try:
-        font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 9)
-    except (OSError, IOError):
-        font = ImageFont.load_default()
+    labels = [f"{t['index']}:{t['id']}" for t in tiles_config]
+    labels = [label[:11] + ".." if len(label) > 12 else label for label in labels]
 
-    # Paste scaled tiles
+    # Upscale the whole sheet once, then composite each tile into its cell
+    scaled_ts = tile_size * scale
+    upscaled = np.repeat(np.repeat(np.asarray(tileset), scale, axis=0), scale, axis=1)
+    preview_arr = np.empty((preview_h, preview_w, 4), dtype=np.uint8)
+    preview_arr[:] = (40, 40, 40, 255)
+
+    cells = []
     for tile_def in tiles_config:
         tile_index = tile_def["index"]
-        tile_id = tile_def["id"]
-
         out_col = tile_index % columns
         out_row = tile_index // columns
-        out_x = out_col * tile_size
-        out_y = out_row * tile_size
 
-        tile_img = tileset.crop((out_x, out_y, out_x + tile_size, out_y + tile_size))
-        scaled = tile_img.resize(
-            (tile_size * scale, tile_size * scale),
-            Image.Resampling.NEAREST,
-        )
-
-        px = out_col * tile_size * scale
+        px = out_col * scaled_ts
         py = out_row * cell_h
+        src_y = out_row * scaled_ts
+        blit_over(preview_arr, upscaled[src_y:src_y + scaled_ts, px:px + scaled_ts], px, py)
+        cells.append((px, py))
 
-        preview.paste(scaled, (px, py), scaled)
-
-        # Draw label
-        label = f"{tile_index}:{tile_id}"
-        if len(label) > 12:
-            label = label[:11] + ".."
+    preview = Image.fromarray(preview_arr)
+    draw = ImageDraw.Draw(preview)
+    for label, (px, py) in zip(labels, cells):
         draw.text(
-            (px + 2, py + tile_size * scale + 1),
+            (px + 2, py + scaled_ts + 1),
             label,
             fill=(200, 200, 200, 255),
             font=font,
         )
-
-        # Draw border
         draw.rectangle(
-            [px, py, px + tile_size * scale, py + tile_size * scale],
+            [px, py, px + scaled_ts, py + scaled_ts],
             outline=(80, 80, 80, 200),
         )
 
-    preview.save(preview_path)
+    save_png(preview, preview_path)
     print(f"Preview saved to {preview_path}")
 
 
-def main() -> None:
-    """Extract tiles from Kenney packs based on manifest and save as tileset PNG."""
+def main(argv=None) -> None:
+    """Parse flags and extract the tileset; exit 1 if --verify fails."""
+    import argparse
+
     parser = argparse.ArgumentParser(
         description="Extract tiles from Kenney asset packs using manifest configuration."
     )
     parser.add_argument(
         "--verify",
         action="store_true",
-        help="Verify extraction accuracy via pHash comparison",
+        help="Verify extraction accuracy against source pixels",
     )
     parser.add_argument(
         "--preview",
         action="store_true",
         help="Generate labeled preview PNG alongside tileset",
     )
-    args = parser.parse_args()
+    parser.add_argument(
+        "--final",
+        action="store_true",
+        help="Save with maximum PNG compression",
+    )
+    parser.add_argument(
+        "--optimize-png",
+        action="store_true",
+        help="Save as an indexed PNG when lossless",
+    )
+    parser.add_argument(
+        "--quiet",
+        action="store_true",
+        help="Don't list each extracted tile",
+    )
+    if not extract_tiles(parser.parse_args(argv)):
+        sys.exit(1)
 
-    manifest = load_manifest()
+
+def extract_tiles(args=None) -> bool:
+    """Extract tiles from Kenney packs based on manifest and save as tileset PNG.
+
+    Batch callers can pass None to use the defaults of every CLI flag without
+    going through argparse. Returns False if --verify found mismatches.
+    """
+    if args is None:
+        args = SimpleNamespace(verify=False, preview=False, final=False, optimize_png=False, quiet=False)
+    manifest = load_manifest("sources", "tileset", "outputs", "version")
     sources_config = manifest["sources"]
     output_config = manifest["outputs"]["tileset"]
     tiles_config = manifest["tileset"]["tiles"]
 
-    source_images = {}
+    # Load source images concurrently (PNG decode releases the GIL); a missing
+    # source surfaces from the load itself rather than a separate exists() check
+    with ThreadPoolExecutor() as pool:
+        source_images = dict(zip(sources_config, pool.map(load_required_source, sources_config.values())))
     for source_name, source_info in sources_config.items():
-        path = source_info["path"]
-        if os.path.exists(path):
-            source_images[source_name] = {
-                "image": Image.open(path),
-                "tileSize": source_info["tileSize"],
-                "spacing": source_info["spacing"],
-            }
-            print(f"Loaded {source_name}: {path}")
-        else:
-            raise FileNotFoundError(f"Source not found: {path}")
+        print(f"Loaded {source_name}: {source_info['path']}")
 
     output_width = output_config["width"]
     output_height = output_config["height"]
     tile_size = output_config["tileSize"]
     columns = output_config["columns"]
 
-    tileset = Image.new("RGBA", (output_width, output_height), (0, 0, 0, 0))
-
-    for tile_def in tiles_config:
-        tile_id = tile_def["id"]
-        tile_index = tile_def["index"]
-        source_name = tile_def["source"]
-        col = tile_def["col"]
-        row = tile_def["row"]
-        purpose = tile_def.get("purpose", "")
+    # Flatten the manifest into primitive columns once; all offsets are then
+    # computed with array arithmetic instead of per-tile dict lookups
+    source_index = {name: i for i, name in enumerate(source_images)}
+    src_tile_size = np.array([s["tileSize"] for s in source_images.values()], np.int32)
+    src_spacing = np.array([s["spacing"] for s in source_images.values()], np.int32)
+
+    src_idx = np.array([source_index.get(d["source"], -1) for d in tiles_config], np.int32)
+    get_cell = itemgetter("col", "row", "index")
+    cols, rows, indices = np.array([get_cell(d) for d in tiles_config], np.int32).reshape(-1, 3).T
+    validate_slots(tiles_config, src_idx, indices, columns * output_config["rows"])
+
+    tile_sizes = src_tile_size[src_idx]
+    pitch = tile_sizes + src_spacing[src_idx]
+    dst_x = indices % columns * tile_size
+    dst_y = indices // columns * tile_size
+
+    if not args.quiet:
+        write_lines([
+            f"[{d['index']:2d}] {d['id']:20s} ({d['col']:2d},{d['row']:2d}) "
+            f"from {d['source']:10s} -> ({d['index'] % columns},{d['index'] // columns}) "
+            f"| {d.get('purpose', '')}"
+            for d in tiles_config
+        ])
+
+    # A source cell referenced at several indices is gathered once; the
+    # repeats are filled by copying its first output slot
+    _, first, inverse = np.unique(
+        np.stack([src_idx, cols, rows], axis=1), axis=0, return_index=True, return_inverse=True
+    )
+    first_slot = first[inverse.ravel()]
+    unique = first_slot == np.arange(len(tiles_config))
+
+    output_arr = np.zeros((output_height, output_width, 4), dtype=np.uint8)
+    blit_all(
+        output_arr,
+        [source["arr"] for source in source_images.values()],
+        src_idx[unique],
+        (cols * pitch)[unique],
+        (rows * pitch)[unique],
+        tile_sizes[unique],
+        tile_sizes[unique],
+        dst_x[unique],
+        dst_y[unique],
+    )
+    for i in np.flatnonzero(~unique).tolist():
+        j = first_slot[i]
+        output_arr[dst_y[i]:dst_y[i] + tile_size, dst_x[i]:dst_x[i] + tile_size] = (
+            output_arr[dst_y[j]:dst_y[j] + tile_size, dst_x[j]:dst_x[j] + tile_size]
+        )
 
-        out_col = tile_index % columns
-        out_row = tile_index // columns
-        out_x = out_col * tile_size
-        out_y = out_row * tile_size
-
-        if source_name in source_images:
-            source = source_images[source_name]
-            try:
-                tile = get_tile(
-                    source["image"],
-                    col,
-                    row,
-                    tile_size=source["tileSize"],
-                    spacing=source["spacing"],
-                )
-                tileset.paste(tile, (out_x, out_y))
-                print(
-                    f"[{tile_index:2d}] {tile_id:20s} ({col:2d},{row:2d}) from {source_name:10s} -> ({out_col},{out_row}) | {purpose}"
-                )
-            except Exception as e:
-                raise RuntimeError(f"Tile extraction failed for {tile_id}: {e}") from e
-        else:
-            raise RuntimeError(
-                f"Source '{source_name}' not loaded for tile '{tile_id}'"
-            )
+    tileset = Image.fromarray(output_arr)
 
     output_path = output_config["path"]
     os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
-    tileset.save(output_path)
+    save_png(tileset, output_path, final=args.final, palette=args.optimize_png)
 
     print(f"\n{'=' * 60}")
     print(f"Saved tileset to {output_path}")
     print(f"Output size: {tileset.size} ({len(tiles_config)} tiles)")
     print(f"Manifest version: {manifest['version']}")
 
+    passed = True
     if args.verify:
-        if not verify_extraction(tileset, tiles_config, source_images, output_config):
-            sys.exit(1)
+        passed = verify_extraction(tileset, tiles_config, source_images, output_config)
 
     if args.preview:
         preview_path = output_path.replace(".png", "_preview.png")
         generate_preview(tileset, tiles_config, output_config, preview_path)
 
+    return passed
+
 
 if __name__ == "__main__":
     main()
@@ -2,24 +2,248 @@
 """Shared utilities for Kenney asset extraction scripts.
 
 Provides common functions used across extract_tileset.py, extract_npc_sprites.py,
-extract_player_sprites.py, and extract_object_sprites.py.
+extract_player_sprites.py, and extract_object_sprites.py. build_all.py imports
+them once to build every sprite atlas in a single process.
 """
 
+import functools
+import hashlib
 import json
 import os
+import sys
 from pathlib import Path
 from typing import Optional
 
+import numpy as np
+import PIL
 from PIL import Image
 
+try:
+    import orjson
+except ImportError:  # optional: faster atlas JSON emission
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # optional: lazy manifest section decoding
+    msgspec = None
+
+# optional: compiled batch blitting for large manifests. Bound by
+# njit_or_none on first use only, since importing numba costs far more than
+# small runs take.
+numba = None
+
 SCRIPT_DIR = Path(__file__).parent
 MANIFEST_PATH = SCRIPT_DIR / "kenney-curation.json"
+DECODE_CACHE_DIR = SCRIPT_DIR / ".cache" / "decoded"
+PHASH_CACHE_PATH = SCRIPT_DIR / ".cache" / "phash.json"
+# Pillow-SIMD releases are versioned like "11.1.0.post0"
+PILLOW_SIMD = ".post" in PIL.__version__
+# Below this many sprites the NumPy loop beats stacking sources for the JIT kernel
+BLIT_ALL_JIT_MIN = 256
+
+
+def load_manifest(*sections: str) -> dict:
+    """Load kenney-curation.json manifest file.
+
+    If section names are given, only those top-level keys are returned. With
+    msgspec installed, the other sections are skipped as raw bytes instead of
+    being parsed into Python objects; otherwise orjson (or the stdlib json
+    module) parses the whole file.
+    """
+    data = MANIFEST_PATH.read_bytes()
+    if sections and msgspec is not None:
+        raw = msgspec.json.decode(data, type=dict[str, msgspec.Raw])
+        return {key: msgspec.json.decode(raw[key]) for key in sections if key in raw}
+
+    manifest = orjson.loads(data) if orjson is not None else json.loads(data)
+    if not sections:
+        return manifest
+    return {key: manifest[key] for key in sections if key in manifest}
+
+
+def existing_paths(paths) -> set:
+    """Return the subset of paths that exist, with one scandir per parent directory."""
+    by_dir: dict = {}
+    for path in paths:
+        by_dir.setdefault(os.path.dirname(path) or ".", []).append(path)
+
+    present = set()
+    for directory, dir_paths in by_dir.items():
+        try:
+            names = {entry.name for entry in os.scandir(directory)}
+        except OSError:
+            continue
+        present.update(p for p in dir_paths if os.path.basename(p) in names)
+    return present
+
+
+def write_lines(lines: list) -> None:
+    """Write buffered log lines to stdout in a single call."""
+    if lines:
+        sys.stdout.write("\n".join(lines) + "\n")
+
+
+def ensure_output_dirs(*paths) -> None:
+    """Create the parent directories of the given output files, once per directory."""
+    for directory in {os.path.dirname(p) or "." for p in paths}:
+        os.makedirs(directory, exist_ok=True)
+
+
+def write_json(path, data: dict) -> None:
+    """Write data as 2-space indented JSON, using orjson when it is installed."""
+    if orjson is not None:
+        with open(path, "wb") as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    else:
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2)
+
+
+@functools.lru_cache(maxsize=None)
+def warn_if_stock_pillow() -> None:
+    """Print a one-time note when PNG work falls back to stock (non-SIMD) Pillow."""
+    if not PILLOW_SIMD:
+        print(
+            f"Note: using stock Pillow {PIL.__version__} for PNG decode/encode; "
+            "install pillow-simd (see tools/requirements.txt) for the SIMD path",
+            file=sys.stderr,
+        )
 
 
-def load_manifest() -> dict:
-    """Load kenney-curation.json manifest file."""
-    with open(MANIFEST_PATH) as f:
-        return json.load(f)
+def ensure_rgba(img: Image.Image) -> Image.Image:
+    """Return img in RGBA mode, skipping the conversion pass if it already is."""
+    return img if img.mode == "RGBA" else img.convert("RGBA")
+
+
+@functools.lru_cache(maxsize=None)
+def load_cv2():
+    """Return OpenCV (optional: faster PNG decode/encode), or None if it isn't installed.
+
+    Imported on first use, so --help and decode-cache hits skip its import cost.
+    """
+    try:
+        import cv2
+    except ImportError:
+        return None
+    return cv2
+
+
+def decode_rgba(path) -> np.ndarray:
+    """Decode an image file to an (H, W, 4) uint8 RGBA array.
+
+    Uses OpenCV's decoder when it is installed, falling back to Pillow.
+    """
+    cv2 = load_cv2()
+    if cv2 is not None:
+        arr = cv2.imread(str(path), cv2.IMREAD_UNCHANGED)
+        if arr is not None and arr.dtype == np.uint8:
+            if arr.ndim == 2:
+                return cv2.cvtColor(arr, cv2.COLOR_GRAY2RGBA)
+            if arr.shape[2] == 3:
+                return cv2.cvtColor(arr, cv2.COLOR_BGR2RGBA)
+            if arr.shape[2] == 4:
+                return cv2.cvtColor(arr, cv2.COLOR_BGRA2RGBA)
+    warn_if_stock_pillow()
+    img = Image.open(path)
+    img.load()
+    return np.asarray(ensure_rgba(img))
+
+
+def palettize(img: Image.Image) -> Optional[Image.Image]:
+    """Losslessly convert an image to P mode with an RGBA palette.
+
+    Returns None if the image has more than 256 distinct RGBA colors.
+    """
+    arr = np.ascontiguousarray(ensure_rgba(img))
+    colors, indices = np.unique(arr.view(np.uint32).ravel(), return_inverse=True)
+    if len(colors) > 256:
+        return None
+    out = Image.frombytes("P", img.size, indices.astype(np.uint8).tobytes())
+    out.putpalette(colors.view(np.uint8).tobytes(), rawmode="RGBA")
+    return out
+
+
+def save_png(img: Image.Image, path, final: bool = False, palette: bool = False) -> None:
+    """Save an atlas PNG.
+
+    Iterative runs use zlib level 1 since PNG save is deflate-bound, encoding
+    through OpenCV when it is installed; pass final for the smallest output
+    (level 9 plus Pillow's optimize pass). With palette, images of at most 256
+    colors are written as indexed PNGs, about a quarter of the RGBA size.
+    """
+    if palette:
+        indexed = palettize(img)
+        if indexed is not None:
+            img = indexed
+        else:
+            print(f"Note: {path} has more than 256 colors, saving as RGBA")
+
+    cv2 = load_cv2() if img.mode == "RGBA" and not final else None
+    if cv2 is not None:
+        bgra = cv2.cvtColor(np.asarray(img), cv2.COLOR_RGBA2BGRA)
+        if not cv2.imwrite(str(path), bgra, [cv2.IMWRITE_PNG_COMPRESSION, 1]):
+            raise OSError(f"Failed to write {path}")
+        return
+
+    warn_if_stock_pillow()
+    if final:
+        img.save(path, optimize=True, compress_level=9)
+    else:
+        img.save(path, compress_level=1)
+
+
+def load_cached_rgba(path) -> Image.Image:
+    """Open an image as RGBA, reusing a decoded copy from a previous run.
+
+    The decoded pixels are cached as .npy under tools/.cache/decoded, keyed by
+    the source path, mtime and size, so unchanged sources skip PNG decode.
+    Within one process the image itself is memoized on the same key, so
+    extractors run back to back (build_all) share it; callers must not
+    modify the returned image in place.
+    """
+    path = Path(path).resolve()
+    stat = path.stat()
+    return _load_rgba_keyed(path, stat.st_mtime_ns, stat.st_size)
+
+
+@functools.lru_cache(maxsize=None)
+def _load_rgba_keyed(path: Path, mtime_ns: int, size: int) -> Image.Image:
+    key = f"{path}:{mtime_ns}:{size}"
+    stem = hashlib.sha1(str(path).encode()).hexdigest()[:16]
+    npy_path = DECODE_CACHE_DIR / f"{stem}.npy"
+    key_path = DECODE_CACHE_DIR / f"{stem}.key"
+
+    try:
+        if key_path.read_text() == key:
+            return Image.fromarray(np.load(npy_path))
+    except (OSError, ValueError):
+        pass
+
+    arr = decode_rgba(path)
+    img = Image.fromarray(arr)
+    try:
+        DECODE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        # Write-then-rename so concurrent extractors never read a partial file
+        tmp_path = npy_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            np.save(f, arr)
+        os.replace(tmp_path, npy_path)
+        key_path.write_text(key)
+    except OSError:
+        pass
+    return img
+
+
+def load_source(source_info: dict) -> dict:
+    """Load a source spritesheet as RGBA along with its NumPy view and grid info."""
+    image = load_cached_rgba(source_info["path"])
+    return {
+        "image": image,
+        "arr": np.asarray(image),
+        "tileSize": source_info["tileSize"],
+        "spacing": source_info["spacing"],
+    }
 
 
 def get_tile(
@@ -45,11 +269,298 @@ def get_tile(
     Returns:
         Cropped tile image.
     """
+    x, y, w, h = tile_bounds(col, row, tile_size, spacing, width, height)
+    return img.crop((x, y, x + w, y + h))
+
+
+@functools.lru_cache(maxsize=4096)
+def tile_bounds(
+    col: int,
+    row: int,
+    tile_size: int = 16,
+    spacing: int = 0,
+    width: int = 1,
+    height: int = 1,
+) -> tuple:
+    """Return the (x, y, w, h) source rectangle of a grid tile, as used by get_tile.
+
+    Memoized: extraction and --verify look up the same grid cells repeatedly.
+    """
     x = col * (tile_size + spacing)
     y = row * (tile_size + spacing)
     w = width * tile_size + (width - 1) * spacing
     h = height * tile_size + (height - 1) * spacing
-    return img.crop((x, y, x + w, y + h))
+    return x, y, w, h
+
+
+def morton_key(row: int, col: int) -> int:
+    """Z-order (Morton) code of a grid cell: interleaves the bits of row and col.
+
+    Sorting reads by this key visits nearby tiles together, which keeps source
+    reads local when manifest entries jump around a large sheet.
+    """
+    key = 0
+    for bit in range(16):
+        key |= ((col >> bit) & 1) << (2 * bit)
+        key |= ((row >> bit) & 1) << (2 * bit + 1)
+    return key
+
+
+def get_tile_array(
+    arr: np.ndarray,
+    col: int,
+    row: int,
+    tile_size: int = 16,
+    spacing: int = 0,
+    width: int = 1,
+    height: int = 1,
+) -> np.ndarray:
+    """NumPy counterpart of get_tile: a view of the tile region of an (H, W, 4) array.
+
+    Unlike Image.crop, regions past the sheet edge are truncated rather than padded.
+    """
+    x, y, w, h = tile_bounds(col, row, tile_size, spacing, width, height)
+    return arr[y:y + h, x:x + w]
+
+
+def blit(dst: np.ndarray, tile: np.ndarray, x: int, y: int) -> None:
+    """Copy tile into dst at (x, y), clipped to dst bounds like Image.paste."""
+    h = min(tile.shape[0], dst.shape[0] - y)
+    w = min(tile.shape[1], dst.shape[1] - x)
+    if h > 0 and w > 0:
+        dst[y:y + h, x:x + w] = tile[:h, :w]
+
+
+def as_pixels(arr: np.ndarray) -> np.ndarray:
+    """View an (H, W, 4) uint8 RGBA array as (H, W) uint32 pixels.
+
+    Writes through the view land in arr. Arrays whose channel axis isn't
+    contiguous can't be reinterpreted and are returned unchanged.
+    """
+    try:
+        return arr.view(np.uint32)[..., 0]
+    except ValueError:
+        return arr
+
+
+def _blit_all_kernel(dst, srcs, src_idx, xs, ys, ws, hs, out_xs, out_ys):
+    for i in numba.prange(len(xs)):
+        dst[out_ys[i]:out_ys[i] + hs[i], out_xs[i]:out_xs[i] + ws[i]] = srcs[
+            src_idx[i], ys[i]:ys[i] + hs[i], xs[i]:xs[i] + ws[i]
+        ]
+
+
+@functools.lru_cache(maxsize=None)
+def load_numba():
+    """Import numba on first use, or return None if it isn't installed."""
+    try:
+        import numba
+    except ImportError:
+        return None
+    return numba
+
+
+def njit_or_none(kernel):
+    """Compile kernel with numba.njit(parallel=True, cache=True), or return None.
+
+    Kernels loop with numba.prange through their module's lazily bound
+    ``numba`` global (None until now), so that global is bound here first.
+    """
+    numba = load_numba()
+    if numba is None:
+        return None
+    kernel.__globals__["numba"] = numba
+    return numba.njit(parallel=True, cache=True)(kernel)
+
+
+@functools.lru_cache(maxsize=None)
+def load_blit_kernel():
+    """Return the numba-compiled blit_all kernel, or None if numba isn't installed."""
+    return njit_or_none(_blit_all_kernel)
+
+
+def blit_all(
+    dst: np.ndarray,
+    sources: list,
+    src_idx,
+    xs,
+    ys,
+    ws,
+    hs,
+    out_xs,
+    out_ys=None,
+) -> None:
+    """Copy many source rectangles into an atlas at once.
+
+    Rectangle i is sources[src_idx[i]][ys[i]:ys[i]+hs[i], xs[i]:xs[i]+ws[i]]
+    and lands at (out_xs[i], out_ys[i]), or on the top row when out_ys is
+    omitted. Rectangles are clipped to their source and to dst, exactly like a
+    loop of blit() calls. Destination slots must not overlap. With numba
+    installed and enough sprites, the copies run in a parallel compiled loop.
+    """
+    src_idx = np.asarray(src_idx, dtype=np.intp)
+    xs = np.asarray(xs, dtype=np.intp)
+    ys = np.asarray(ys, dtype=np.intp)
+    out_xs = np.asarray(out_xs, dtype=np.intp)
+    if out_ys is None:
+        out_ys = np.zeros_like(out_xs)
+    else:
+        out_ys = np.asarray(out_ys, dtype=np.intp)
+    src_h = np.array([src.shape[0] for src in sources], dtype=np.intp)
+    src_w = np.array([src.shape[1] for src in sources], dtype=np.intp)
+    hs = np.minimum(np.minimum(hs, src_h[src_idx] - ys), dst.shape[0] - out_ys).clip(min=0)
+    ws = np.minimum(np.minimum(ws, src_w[src_idx] - xs), dst.shape[1] - out_xs).clip(min=0)
+
+    kernel = load_blit_kernel() if len(xs) >= BLIT_ALL_JIT_MIN else None
+    if kernel is not None:
+        stacked = np.zeros((len(sources), src_h.max(), src_w.max(), 4), dtype=np.uint8)
+        for i, src in enumerate(sources):
+            stacked[i, :src.shape[0], :src.shape[1]] = src
+        kernel(dst, stacked, src_idx, xs, ys, ws, hs, out_xs, out_ys)
+        return
+
+    # Copy whole RGBA pixels as uint32 so each row is one run of 4-byte stores
+    dst_px = as_pixels(dst)
+    src_px = [as_pixels(src) for src in sources]
+    rects = zip(
+        src_idx.tolist(), xs.tolist(), ys.tolist(), ws.tolist(), hs.tolist(),
+        out_xs.tolist(), out_ys.tolist(),
+    )
+    for i, x, y, w, h, out_x, out_y in rects:
+        if w and h:
+            dst_px[out_y:out_y + h, out_x:out_x + w] = src_px[i][y:y + h, x:x + w]
+
+
+def blit_over(dst: np.ndarray, tile: np.ndarray, x: int, y: int) -> None:
+    """Blend an RGBA tile into dst at (x, y) using its alpha as the mask.
+
+    Reproduces Image.paste(tile, (x, y), tile) exactly, including the
+    rounding of Pillow's integer blend, with clipping to dst bounds.
+    """
+    h = min(tile.shape[0], dst.shape[0] - y)
+    w = min(tile.shape[1], dst.shape[1] - x)
+    if h <= 0 or w <= 0:
+        return
+    region = dst[y:y + h, x:x + w]
+    src = tile[:h, :w].astype(np.uint32)
+    alpha = src[..., 3:4]
+    blended = region.astype(np.uint32) * (255 - alpha) + src * alpha + 128
+    region[...] = ((blended >> 8) + blended) >> 8
+
+
+def crop_array(arr: np.ndarray, x: int, y: int, w: int, h: int) -> np.ndarray:
+    """NumPy counterpart of Image.crop on an (H, W, 4) array.
+
+    Returns a view when the box lies inside the array; like Image.crop,
+    regions past the edge are padded with transparent pixels.
+    """
+    if x >= 0 and y >= 0 and x + w <= arr.shape[1] and y + h <= arr.shape[0]:
+        return arr[y:y + h, x:x + w]
+    out = np.zeros((h, w) + arr.shape[2:], dtype=arr.dtype)
+    sx, sy = max(x, 0), max(y, 0)
+    region = arr[sy:y + h, sx:x + w]
+    out[sy - y:sy - y + region.shape[0], sx - x:sx - x + region.shape[1]] = region
+    return out
+
+
+def tiles_match(extracted, original) -> bool:
+    """Return True if two tiles are pixel-identical once normalized to RGBA.
+
+    Tiles may be images or RGBA arrays. Extraction is a pure crop+paste, so
+    exact byte equality is the correct (and cheapest) verification criterion.
+    """
+    a = extracted if isinstance(extracted, np.ndarray) else np.asarray(ensure_rgba(extracted))
+    b = original if isinstance(original, np.ndarray) else np.asarray(ensure_rgba(original))
+    return a.shape == b.shape and np.array_equal(a, b)
+
+
+def _load_phash_cache() -> dict:
+    try:
+        data = PHASH_CACHE_PATH.read_bytes()
+    except OSError:
+        return {}
+    try:
+        return orjson.loads(data) if orjson is not None else json.loads(data)
+    except ValueError:
+        return {}
+
+
+def _save_phash_cache(cache: dict) -> None:
+    try:
+        PHASH_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = PHASH_CACHE_PATH.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(cache))
+        os.replace(tmp_path, PHASH_CACHE_PATH)
+    except OSError:
+        pass
+
+
+def as_image(img) -> Image.Image:
+    """Wrap an RGBA array as an image; images pass through unchanged."""
+    return Image.fromarray(img) if isinstance(img, np.ndarray) else img
+
+
+def _phash_key(img) -> str:
+    """Digest of an image's mode, size and pixels; RGBA arrays hash like images."""
+    if isinstance(img, np.ndarray):
+        digest = hashlib.blake2b(f"RGBA:{(img.shape[1], img.shape[0])}:".encode(), digest_size=16)
+        digest.update(np.ascontiguousarray(img))
+    else:
+        digest = hashlib.blake2b(f"{img.mode}:{img.size}:".encode(), digest_size=16)
+        digest.update(img.tobytes())
+    return digest.hexdigest()
+
+
+def _compute_phash(images: list) -> np.ndarray:
+    from scipy.fft import dct
+
+    stack = np.stack([
+        np.asarray(as_image(img).convert("L").resize((32, 32), Image.Resampling.LANCZOS), dtype=np.float64)
+        for img in images
+    ])
+    coeffs = dct(dct(stack, axis=1), axis=2)[:, :8, :8].reshape(len(images), 64)
+    return coeffs > np.median(coeffs, axis=1, keepdims=True)
+
+
+def batch_phash(images: list) -> np.ndarray:
+    """Compute pHash bits for many images with one batched DCT.
+
+    Matches imagehash.phash (32x32 LANCZOS grayscale, 8x8 low-frequency block
+    thresholded at its median) and returns an (N, 64) boolean array. Images
+    may also be RGBA arrays, e.g. crop_array slices. Hashes
+    are cached in tools/.cache/phash.json keyed by a digest of the pixels, so
+    unchanged tiles skip the DCT on later --verify runs.
+    """
+    if not images:
+        return np.zeros((0, 64), dtype=bool)
+
+    keys = [_phash_key(img) for img in images]
+    cache = _load_phash_cache()
+    missing = [i for i, key in enumerate(keys) if key not in cache]
+    if missing:
+        computed = _compute_phash([images[i] for i in missing])
+        for i, bits in zip(missing, np.packbits(computed, axis=1)):
+            cache[keys[i]] = bits.tobytes().hex()
+        _save_phash_cache(cache)
+
+    packed = np.frombuffer(bytes.fromhex("".join(cache[key] for key in keys)), dtype=np.uint8)
+    return np.unpackbits(packed.reshape(len(keys), 8), axis=1).astype(bool)
+
+
+def phash_distances(hashes_a: np.ndarray, hashes_b: np.ndarray) -> np.ndarray:
+    """Hamming distance between rows of two batch_phash results."""
+    return np.count_nonzero(hashes_a != hashes_b, axis=1)
+
+
+@functools.lru_cache(maxsize=None)
+def load_font(size: int):
+    """Load the preview label font once per size, falling back to Pillow's default."""
+    from PIL import ImageFont
+
+    try:
+        return ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", size)
+    except (OSError, IOError):
+        return ImageFont.load_default()
 
 
 def generate_sprite_preview(
@@ -65,59 +576,64 @@ def generate_sprite_preview(
 
     Args:
         output_img: The assembled spritesheet.
-        items: List of sprite config dicts.
+        items: List of sprite config dicts, or plain sprite IDs.
         tile_size: Default tile size.
         preview_path: Output path for preview PNG.
         id_key: Key to use for label text from each item.
         get_out_x: Optional callable(item, idx) -> out_x. Defaults to idx * tile_size.
-        get_dimensions: Optional callable(item) -> (w, h). Defaults to (tile_size, tile_size).
+        get_dimensions: Optional callable(item, idx) -> (w, h). Defaults to (tile_size, tile_size).
     """
-    from PIL import ImageDraw, ImageFont
+    from PIL import ImageDraw
 
     scale = 4
     label_h = 14
 
+    # Resolve positions and sizes once so the blit loop only zips columns
+    if get_out_x:
+        out_xs = [get_out_x(item, idx) for idx, item in enumerate(items)]
+    else:
+        out_xs = range(0, len(items) * tile_size, tile_size)
     if get_dimensions:
-        max_h = max((get_dimensions(item)[1] for item in items), default=tile_size)
-        pw = sum(get_dimensions(item)[0] * scale for item in items)
+        dims = [get_dimensions(item, idx) for idx, item in enumerate(items)]
     else:
-        max_h = tile_size
-        pw = len(items) * tile_size * scale
+        dims = [(tile_size, tile_size)] * len(items)
+    max_h = max((h for _, h in dims), default=tile_size)
+    pw = sum(w for w, _ in dims) * scale
     ph = max_h * scale + label_h
 
-    preview = Image.new("RGBA", (pw, ph), (40, 40, 40, 255))
+    font = load_font(9)
+
+    labels = [
+        item.get(id_key, str(idx)) if isinstance(item, dict) else str(item)
+        for idx, item in enumerate(items)
+    ]
+    labels = [label[:11] + ".." if len(label) > 12 else label for label in labels]
+
+    # Composite sprites onto the background at 1x, then upscale the strip with
+    # a single np.repeat; the background is uniform, so this matches
+    # compositing each upscaled sprite
+    source_arr = np.asarray(ensure_rgba(output_img))
+    strip = np.empty((max_h, pw // scale, 4), dtype=np.uint8)
+    strip[:] = (40, 40, 40, 255)
+    cells = []
+    x = 0
+    for out_x, (w, h) in zip(out_xs, dims):
+        blit_over(strip, source_arr[0:h, out_x:out_x + w], x, 0)
+        cells.append((x * scale, w, h))
+        x += w
+
+    preview_arr = np.empty((ph, pw, 4), dtype=np.uint8)
+    preview_arr[max_h * scale:] = (40, 40, 40, 255)
+    preview_arr[:max_h * scale] = strip.repeat(scale, axis=0).repeat(scale, axis=1)
+
+    preview = Image.fromarray(preview_arr)
     draw = ImageDraw.Draw(preview)
-
-    try:
-        font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 9)
-    except (OSError, IOError):
-        font = ImageFont.load_default()
-
-    px = 0
-    for idx, item in enumerate(items):
-        if get_out_x:
-            out_x = get_out_x(item, idx)
-        else:
-            out_x = idx * tile_size
-
-        if get_dimensions:
-            w, h = get_dimensions(item)
-        else:
-            w, h = tile_size, tile_size
-
-        sprite = output_img.crop((out_x, 0, out_x + w, h))
-        scaled = sprite.resize((w * scale, h * scale), Image.Resampling.NEAREST)
-        preview.paste(scaled, (px, 0), scaled)
-
-        label = item.get(id_key, str(idx)) if isinstance(item, dict) else str(idx)
-        if len(label) > 12:
-            label = label[:11] + ".."
+    for label, (px, w, h) in zip(labels, cells):
         draw.text((px + 2, h * scale + 1), label, fill=(200, 200, 200, 255), font=font)
         draw.rectangle([px, 0, px + w * scale, h * scale], outline=(80, 80, 80, 200))
-        px += w * scale
 
     os.makedirs(os.path.dirname(preview_path) or ".", exist_ok=True)
-    preview.save(preview_path)
+    save_png(preview, preview_path)
     print(f"Preview saved to {preview_path}")
 
 
@@ -130,8 +646,12 @@ def verify_sprites(
     label: str = "Sprites",
     get_coords=None,
     get_out_x=None,
+    fuzzy: bool = False,
 ) -> bool:
-    """Verify extracted sprites against source using pHash.
+    """Verify extracted sprites against source.
+
+    Sprites are compared byte-for-byte by default. With ``fuzzy`` the pHash
+    distance is used instead, for outputs that may have been resampled.
 
     Args:
         output_img: Assembled spritesheet.
@@ -142,16 +662,11 @@ def verify_sprites(
         label: Label for verification output.
         get_coords: Optional callable(item) -> (col, row). Defaults to item["base"]["col"], item["base"]["row"].
         get_out_x: Optional callable(item, idx) -> out_x. Defaults to idx * tile_size.
+        fuzzy: Compare pHash distance instead of exact pixels.
 
     Returns:
         True if all verifications pass.
     """
-    try:
-        import imagehash
-    except ImportError:
-        print("Warning: imagehash not installed, skipping verification")
-        return True
-
     if source_img is None:
         print(f"Warning: No source image for {label}, skipping verification")
         return True
@@ -160,32 +675,158 @@ def verify_sprites(
     print(f"VERIFICATION: {label}")
     print(f"{'=' * 60}")
 
-    all_pass = True
-    for idx, item in enumerate(items):
-        item_id = item.get("id", str(idx))
+    # Resolve ids, positions and coordinates once, outside the crop loop
+    ids = [item.get("id", str(idx)) for idx, item in enumerate(items)]
+    if get_out_x:
+        out_xs = [get_out_x(item, idx) for idx, item in enumerate(items)]
+    else:
+        out_xs = range(0, len(items) * tile_size, tile_size)
+    if get_coords:
+        coords = [get_coords(item) for item in items]
+    else:
+        bases = [item.get("base", item) for item in items]
+        coords = [(base["col"], base["row"]) for base in bases]
+
+    # Slice both sheets as arrays; crop_array only copies at the sheet edges
+    output_arr = np.asarray(ensure_rgba(output_img))
+    source_arr = np.asarray(ensure_rgba(source_img))
+    pairs = [
+        (
+            item_id,
+            crop_array(output_arr, out_x, 0, tile_size, tile_size),
+            crop_array(source_arr, *tile_bounds(col, row, tile_size, spacing)),
+        )
+        for item_id, out_x, (col, row) in zip(ids, out_xs, coords)
+    ]
+
+    if fuzzy:
+        # Hash extracted and original tiles in one DCT pass, then split
+        try:
+            hashes = batch_phash([p[1] for p in pairs] + [p[2] for p in pairs])
+        except ImportError:
+            print("Warning: scipy not installed, skipping verification")
+            return True
+        dists = phash_distances(hashes[:len(pairs)], hashes[len(pairs):])
 
-        if get_out_x:
-            out_x = get_out_x(item, idx)
+    all_pass = True
+    report = []
+    for i, (item_id, extracted, original) in enumerate(pairs):
+        if fuzzy:
+            dist = int(dists[i])
+            passed = dist == 0
+            status = "PASS" if passed else f"FAIL(dist={dist})"
         else:
-            out_x = idx * tile_size
+            passed = tiles_match(extracted, original)
+            status = "PASS" if passed else "FAIL(bytediff)"
+        if not passed:
+            all_pass = False
+        report.append(f"  {item_id:20s} {status}")
+
+    write_lines(report)
+    return all_pass
 
-        extracted = output_img.crop((out_x, 0, out_x + tile_size, tile_size))
 
-        if get_coords:
-            col, row = get_coords(item)
-        else:
-            base = item.get("base", item)
-            col, row = base["col"], base["row"]
+def sprite_arg_parser(description: str, item_noun: str = "sprite"):
+    """Build the argparse parser shared by the sprite atlas extractors."""
+    import argparse
 
-        original = get_tile(source_img, col, row, tile_size, spacing)
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--verify", action="store_true", help="Verify extraction accuracy")
+    parser.add_argument("--fuzzy", action="store_true", help="Verify via pHash instead of exact pixels")
+    parser.add_argument("--preview", action="store_true", help="Generate labeled preview PNG")
+    parser.add_argument("--final", action="store_true", help="Save with maximum PNG compression")
+    parser.add_argument("--optimize-png", action="store_true", help="Save as an indexed PNG when lossless")
+    parser.add_argument("--quiet", action="store_true", help=f"Don't list each extracted {item_noun}")
+    return parser
 
-        h_ext = imagehash.phash(extracted)
-        h_orig = imagehash.phash(original)
-        dist = h_ext - h_orig
 
-        status = "PASS" if dist == 0 else f"FAIL(dist={dist})"
-        if dist > 0:
-            all_pass = False
-        print(f"  {item_id:20s} {status}")
+def extract_character_sprites(section: str, noun: str, describe, args) -> bool:
+    """Extract one manifest section of Kenney character sprites into an atlas.
 
-    return all_pass
+    NPCs and players are single tiles from the characters sheet laid out in a
+    row, so both share this routine and differ only in naming.
+
+    Args:
+        section: Manifest section and output key (e.g. "npcs", "players").
+        noun: Name used in log messages (e.g. "NPC", "player").
+        describe: Callable(item) -> trailing text for each sprite's log line.
+        args: Parsed sprite_arg_parser() arguments.
+
+    Returns:
+        False if --verify found mismatches, True otherwise.
+    """
+    title = noun[0].upper() + noun[1:]
+    manifest = load_manifest("sources", section, "outputs", "version")
+    char_source = manifest["sources"]["characters"]
+    sprites_config = manifest[section]["sprites"]
+    output_config = manifest["outputs"][section]
+
+    source_img = load_cached_rgba(char_source["path"])
+    tile_size = char_source["tileSize"]
+    spacing = char_source["spacing"]
+    print(f"Source spritesheet size: {source_img.size}")
+
+    output_width = len(sprites_config) * tile_size
+    output_height = tile_size
+
+    # Sprites are equal-sized cells laid out left to right, so every source
+    # and destination offset comes from one vectorized computation
+    n = len(sprites_config)
+    cols = np.array([sprite["base"]["col"] for sprite in sprites_config], np.int32)
+    rows = np.array([sprite["base"]["row"] for sprite in sprites_config], np.int32)
+    pitch = tile_size + spacing
+    sizes = np.full(n, tile_size, np.int32)
+    out_xs = np.arange(n, dtype=np.int32) * tile_size
+
+    output_arr = np.zeros((output_height, output_width, 4), dtype=np.uint8)
+    blit_all(
+        output_arr, [np.asarray(source_img)], np.zeros(n, np.int32),
+        cols * pitch, rows * pitch, sizes, sizes, out_xs,
+    )
+
+    frames = {}
+    log_lines = []
+    for sprite, col, row, out_x in zip(sprites_config, cols.tolist(), rows.tolist(), out_xs.tolist()):
+        sprite_id = sprite["id"]
+        frames[sprite_id] = {
+            "frame": {"x": out_x, "y": 0, "w": tile_size, "h": tile_size},
+            "sourceSize": {"w": tile_size, "h": tile_size},
+            "spriteSourceSize": {"x": 0, "y": 0, "w": tile_size, "h": tile_size},
+        }
+        log_lines.append(f"{title} {sprite_id:20s}: ({col:2d},{row:2d}) -> x={out_x:3d} | {describe(sprite)}")
+
+    if not args.quiet:
+        write_lines(log_lines)
+
+    output_img = Image.fromarray(output_arr)
+    ensure_output_dirs(output_config["pngPath"], output_config["jsonPath"])
+    save_png(output_img, output_config["pngPath"], final=args.final, palette=args.optimize_png)
+    print(f"\nSaved {noun} spritesheet to {output_config['pngPath']}")
+    print(f"Output size: {output_img.size}")
+
+    atlas_json = {
+        "frames": frames,
+        "meta": {
+            "image": f"{section}.png",
+            "size": {"w": output_width, "h": output_height},
+            "scale": 1,
+            "format": "RGBA8888",
+        },
+    }
+
+    write_json(output_config["jsonPath"], atlas_json)
+    print(f"Saved {noun} atlas JSON to {output_config['jsonPath']}")
+    print(f"Manifest version: {manifest['version']}")
+
+    passed = True
+    if args.verify:
+        passed = verify_sprites(
+            output_img, sprites_config, source_img, tile_size, spacing,
+            label=f"{title} sprites", fuzzy=args.fuzzy,
+        )
+
+    if args.preview:
+        preview_path = output_config["pngPath"].replace(".png", "_preview.png")
+        generate_sprite_preview(output_img, sprites_config, tile_size, preview_path)
+
+    return passed
@@ -1,20 +1,26 @@
 #!/usr/bin/env python3
 """Generate custom pixel art sprites from JSON definitions."""
 
+import numpy as np
 from PIL import Image
 import json
 import os
 import sys
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 SCRIPT_DIR = Path(__file__).parent
 MANIFEST_PATH = SCRIPT_DIR / "sprites" / "custom-sprites.json"
 
 
 def load_manifest() -> dict:
-    """Load custom-sprites.json manifest file."""
-    with open(MANIFEST_PATH) as f:
-        return json.load(f)
+    """Load custom-sprites.json manifest file, parsing the raw bytes with orjson when installed."""
+    data = MANIFEST_PATH.read_bytes()
+    return orjson.loads(data) if orjson is not None else json.loads(data)
 
 
 def generate_sprite(sprite_def: dict, palette: dict, charmap: dict) -> Image.Image:
@@ -23,17 +29,31 @@ def generate_sprite(sprite_def: dict, palette: dict, charmap: dict) -> Image.Ima
     height = sprite_def["height"]
     pixels_data = sprite_def["pixels"]
 
-    img = Image.new("RGBA", (width, height), (0, 0, 0, 0))
-    pixels = img.load()
-
-    for y, row in enumerate(pixels_data):
-        for x, char in enumerate(row):
-            if x < width and y < height:
-                color_name = charmap.get(char, "transparent")
-                color = tuple(palette.get(color_name, [0, 0, 0, 0]))
-                pixels[x, y] = color
-
-    return img
+    # Color LUT: one entry per charmap key (sorted by code point), then the
+    # color for unmapped characters, then the background for cells no row covers
+    keys = sorted(charmap)
+    key_codes = np.array([ord(k) for k in keys] + [0xFFFFFFFF], dtype=np.uint32)
+    lut = np.array(
+        [palette.get(charmap[k], [0, 0, 0, 0]) for k in keys]
+        + [palette.get("transparent", [0, 0, 0, 0]), [0, 0, 0, 0]],
+        dtype=np.uint8,
+    )
+
+    codes = np.zeros((height, width), dtype=np.uint32)
+    filled = np.zeros((height, width), dtype=bool)
+    for y, row in enumerate(pixels_data[:height]):
+        row = row[:width]
+        codes[y, :len(row)] = np.frombuffer(row.encode("utf-32-le"), dtype=np.uint32)
+        filled[y, :len(row)] = True
+
+    pos = np.searchsorted(key_codes, codes)
+    index = np.where(key_codes[pos] == codes, pos, len(keys))
+    index[~filled] = len(keys) + 1
+
+    # Gather packed RGBA words, one uint32 store per pixel, and hand the
+    # buffer to Pillow without another copy
+    pixels = lut.view(np.uint32).reshape(-1)[index]
+    return Image.frombuffer("RGBA", (width, height), pixels, "raw", "RGBA", 0, 1)
 
 
 def main() -> None:
@@ -46,6 +66,7 @@ def main() -> None:
     sprite_filter = sys.argv[1] if len(sys.argv) > 1 else None
 
     generated = 0
+    log_lines = []
     for sprite_def in sprites:
         sprite_id = sprite_def["id"]
 
@@ -62,12 +83,14 @@ def main() -> None:
             os.makedirs(output_dir, exist_ok=True)
         img.save(output_path)
 
-        print(f"[{sprite_id}] {img.size[0]}x{img.size[1]} -> {output_path}")
-        print(f"    {description}")
+        log_lines.append(f"[{sprite_id}] {img.size[0]}x{img.size[1]} -> {output_path}")
+        log_lines.append(f"    {description}")
         generated += 1
 
-    print(f"\nGenerated {generated} sprite(s)")
-    print(f"Manifest version: {manifest['version']}")
+    # One write for the whole report rather than a print per line
+    log_lines.append(f"\nGenerated {generated} sprite(s)")
+    log_lines.append(f"Manifest version: {manifest['version']}")
+    sys.stdout.write("\n".join(log_lines) + "\n")
 
 
 if __name__ == "__main__":
@@ -4,11 +4,16 @@ Generate a village road map with proper tilemap data for Phaser.
 Creates visual tilemap image and collision data.
 """
 
-from PIL import Image, ImageDraw, ImageFont
+import functools
+
+import numpy as np
+from PIL import Image, ImageDraw
 import json
 import os
 import math
 
+from extract_utils import load_font
+
 MAP_WIDTH = 64
 MAP_HEIGHT = 52
 TILE_SIZE = 16
@@ -27,123 +32,200 @@ ZONE_BOUNDS = {
     "plaza": {"x": 40, "y": 33, "width": 18, "height": 17, "spawn": (49, 42)},
 }
 
+# Visualization PNGs are dev artifacts: save them fast by default, and set
+# OPENCLAW_PNG_LEVEL=9 for the smallest files
+PNG_SAVE_KWARGS = {
+    "compress_level": int(os.environ.get("OPENCLAW_PNG_LEVEL", "1")),
+    "optimize": False,
+}
+
+TILE_COLORS = {
+    GRASS: (76, 153, 0, 255),
+    ROAD: (210, 210, 210, 255),
+    WATER: (64, 164, 223, 255),
+    GRASS_PLAZA: (102, 178, 51, 255),
+}
+
+ZONE_COLORS = {
+    "lobby": (200, 230, 201, 200),
+    "office": (187, 222, 251, 200),
+    "meeting-center": (255, 224, 178, 200),
+    "lounge-cafe": (248, 187, 208, 200),
+    "arcade": (225, 190, 231, 200),
+    "plaza": (255, 249, 196, 200),
+}
+
+# Collision overlay colors, indexed by collision value (0 walkable, 1 blocked)
+COLLISION_COLORS = np.array([(0, 255, 0, 100), (255, 0, 0, 150)], dtype=np.uint8)
+
+
+@functools.lru_cache(maxsize=1)
+def tile_templates():
+    """Build the TILE_SIZE RGBA template of each ground tile type once."""
+    road_tile = Image.new("RGBA", (TILE_SIZE, TILE_SIZE), TILE_COLORS[ROAD])
+    draw_road = ImageDraw.Draw(road_tile)
+    for i in range(0, TILE_SIZE, 8):
+        draw_road.line([(i, 0), (i, TILE_SIZE)], fill=(180, 180, 180), width=1)
+        draw_road.line([(0, i), (TILE_SIZE, i)], fill=(180, 180, 180), width=1)
+
+    templates = np.empty((len(TILE_COLORS), TILE_SIZE, TILE_SIZE, 4), dtype=np.uint8)
+    for tile_type, color in TILE_COLORS.items():
+        templates[tile_type] = color
+    templates[ROAD] = np.asarray(road_tile)
+    templates.flags.writeable = False
+    return templates
+
+
+@functools.lru_cache(maxsize=1)
+def zone_cell_masks():
+    """Return a per-tile boolean mask of each zone's bounds, built once."""
+    masks = {}
+    for zone_name, bounds in ZONE_BOUNDS.items():
+        cells = np.zeros((MAP_HEIGHT, MAP_WIDTH), dtype=bool)
+        cells[
+            max(bounds["y"], 0):bounds["y"] + bounds["height"],
+            max(bounds["x"], 0):bounds["x"] + bounds["width"],
+        ] = True
+        cells.flags.writeable = False
+        masks[zone_name] = cells
+    return masks
+
+
+@functools.lru_cache(maxsize=32)
+def render_label(text, font, padding, box_fill, text_fill):
+    """Rasterize a label on its padded box once; returns (image, text_width, text_height).
+
+    The box replaces what is under it, so pasting the image without a mask
+    matches drawing the box and text in place. The image is None when the
+    text may reach past the box (large fonts); such labels must be drawn.
+    """
+    bbox = ImageDraw.Draw(Image.new("RGBA", (1, 1))).textbbox((0, 0), text, font=font)
+    text_width = bbox[2] - bbox[0]
+    text_height = bbox[3] - bbox[1]
+    if not (-padding <= bbox[0] <= padding and -padding <= bbox[1] <= padding):
+        return None, text_width, text_height
+
+    label = Image.new("RGBA", (text_width + 2 * padding + 1, text_height + 2 * padding + 1), box_fill)
+    ImageDraw.Draw(label).text((padding, padding), text, fill=text_fill, font=font)
+    return label, text_width, text_height
+
+
+def render_panel(width, height, draw_panel, *args):
+    """Rasterize draw_panel(draw, x, y, *args) as a standalone width x height image.
+
+    As with render_label, the panel's box replaces what is under it, so the
+    image stands in for drawing the panel in place. The image is None when
+    anything is drawn outside the box; such panels must be drawn in place.
+    """
+    margin = 32
+    canvas = Image.new("RGBA", (width + 2 * margin, height + 2 * margin))
+    draw_panel(ImageDraw.Draw(canvas), margin, margin, *args)
+    box = (margin, margin, margin + width, margin + height)
+    if canvas.getbbox() != box:
+        return None
+    return canvas.crop(box)
+
+
+def tile_cells(pixels):
+    """View an RGBA image array as its (H, W, TILE_SIZE, TILE_SIZE, 4) grid of tiles."""
+    rows, cols = pixels.shape[0] // TILE_SIZE, pixels.shape[1] // TILE_SIZE
+    return pixels.reshape(rows, TILE_SIZE, cols, TILE_SIZE, 4).transpose(0, 2, 1, 3, 4)
+
+
+def gather_tiles(templates, tile_ids):
+    """Lay out templates[tile_ids] as one RGBA image array.
+
+    Each distinct id's template is broadcast into its cells of the output
+    through a tile view, so no per-cell copy of the grid is materialized.
+    """
+    rows, cols = tile_ids.shape
+    pixels = np.empty((rows * TILE_SIZE, cols * TILE_SIZE, 4), dtype=np.uint8)
+    cells = tile_cells(pixels)
+    for tile_id in np.unique(tile_ids).tolist():
+        cells[tile_ids == tile_id] = templates[tile_id]
+    return pixels
+
+
+def blend_color(pixels, mask, color):
+    """Blend an RGBA color into pixels where mask is set.
+
+    Matches Image.paste(overlay, box, overlay) for a solid overlay, including
+    Pillow's integer rounding and blending of the alpha channel.
+    """
+    alpha = color[3]
+    blended = pixels[mask].astype(np.uint32) * (255 - alpha) + np.array(color, np.uint32) * alpha + 128
+    pixels[mask] = ((blended >> 8) + blended) >> 8
+
+
+def draw_outline(pixels, x0, y0, x1, y1, width, color):
+    """Draw a rectangle outline in place, like ImageDraw.rectangle(outline=, width=).
+
+    The corners are inclusive and the outline runs inward from them; pixels
+    are replaced, not blended, as ImageDraw does on an RGBA image.
+    """
+    pixels[y0:y0 + width, x0:x1 + 1] = color
+    pixels[max(y1 - width + 1, y0):y1 + 1, x0:x1 + 1] = color
+    pixels[y0:y1 + 1, x0:x0 + width] = color
+    pixels[y0:y1 + 1, max(x1 - width + 1, x0):x1 + 1] = color
+
+
+def draw_grid(pixels, color):
+    """Draw 1px tile grid lines in place, like ImageDraw.line without blending.
+
+    The closing lines at the right and bottom edges fall outside the image,
+    so only every TILE_SIZE-th row and column from the origin is set.
+    """
+    pixels[::TILE_SIZE, :] = color
+    pixels[:, ::TILE_SIZE] = color
+
 
 def create_tile_map():
-    ground = [[GRASS for _ in range(MAP_WIDTH)] for _ in range(MAP_HEIGHT)]
-    collision = [[0 for _ in range(MAP_WIDTH)] for _ in range(MAP_HEIGHT)]
-
-    for y in range(3):
-        for x in range(MAP_WIDTH):
-            ground[y][x] = WATER
-            collision[y][x] = 1
-    for y in range(3, 20):
-        for x in range(5):
-            ground[y][x] = WATER
-            collision[y][x] = 1
+    ground = np.full((MAP_HEIGHT, MAP_WIDTH), GRASS, dtype=np.uint8)
+    collision = np.zeros((MAP_HEIGHT, MAP_WIDTH), dtype=np.uint8)
+
+    ground[:3, :] = WATER
+    collision[:3, :] = 1
+    ground[3:20, :5] = WATER
+    collision[3:20, :5] = 1
 
     for i in range(14):
         y = 3 + i
         x_start = 5 + int(i * 0.8)
-        x_end = x_start + 3
-        for x in range(x_start, min(x_end, 18)):
-            if y < MAP_HEIGHT and x < MAP_WIDTH:
-                ground[y][x] = ROAD
-                collision[y][x] = 0
-
-    for y in range(12, 16):
-        for x in range(17, 40):
-            ground[y][x] = ROAD
-            collision[y][x] = 0
-
-    for y in range(16, 38):
-        for x in range(17, 21):
-            ground[y][x] = ROAD
-            collision[y][x] = 0
-
-    for y in range(16, 18):
-        for x in range(21, 40):
-            ground[y][x] = ROAD
-            collision[y][x] = 0
-
-    for y in range(18, 33):
-        for x in range(37, 40):
-            ground[y][x] = ROAD
-            collision[y][x] = 0
-
-    for y in range(33, 36):
-        for x in range(21, 58):
-            ground[y][x] = ROAD
-            collision[y][x] = 0
-
-    for y in range(36, 50):
-        for x in range(17, 58):
-            ground[y][x] = ROAD
-            collision[y][x] = 0
-
-    for y in range(18, 33):
-        for x in range(21, 37):
-            ground[y][x] = GRASS_PLAZA
-            collision[y][x] = 0
-
-    for zone_name, bounds in ZONE_BOUNDS.items():
-        for y in range(bounds["y"], bounds["y"] + bounds["height"]):
-            for x in range(bounds["x"], bounds["x"] + bounds["width"]):
-                if 0 <= y < MAP_HEIGHT and 0 <= x < MAP_WIDTH:
-                    if ground[y][x] == GRASS:
-                        collision[y][x] = 0
-
+        x_end = min(x_start + 3, 18)
+        ground[y, x_start:x_end] = ROAD
+        collision[y, x_start:x_end] = 0
+
+    for (y0, y1), (x0, x1) in (
+        ((12, 16), (17, 40)),
+        ((16, 38), (17, 21)),
+        ((16, 18), (21, 40)),
+        ((18, 33), (37, 40)),
+        ((33, 36), (21, 58)),
+        ((36, 50), (17, 58)),
+    ):
+        ground[y0:y1, x0:x1] = ROAD
+        collision[y0:y1, x0:x1] = 0
+
+    ground[18:33, 21:37] = GRASS_PLAZA
+    collision[18:33, 21:37] = 0
+
+    # Only water cells are ever blocked, so grass inside zones is already
+    # walkable and needs no second pass over the zone bounds
     return ground, collision
 
 
 def render_visual_map(ground, collision):
-    colors = {
-        GRASS: (76, 153, 0, 255),
-        ROAD: (210, 210, 210, 255),
-        WATER: (64, 164, 223, 255),
-        GRASS_PLAZA: (102, 178, 51, 255),
-    }
-
-    zone_colors = {
-        "lobby": (200, 230, 201, 200),
-        "office": (187, 222, 251, 200),
-        "meeting-center": (255, 224, 178, 200),
-        "lounge-cafe": (248, 187, 208, 200),
-        "arcade": (225, 190, 231, 200),
-        "plaza": (255, 249, 196, 200),
-    }
+    ground = np.asarray(ground)
 
-    img_width = MAP_WIDTH * TILE_SIZE
-    img_height = MAP_HEIGHT * TILE_SIZE
-    img = Image.new("RGBA", (img_width, img_height))
+    # Broadcast the cached per-type templates into every cell
+    pixels = gather_tiles(tile_templates(), ground)
 
-    road_tile = Image.new("RGBA", (32, 32), colors[ROAD])
-    draw_road = ImageDraw.Draw(road_tile)
-    for i in range(0, 32, 8):
-        draw_road.line([(i, 0), (i, 32)], fill=(180, 180, 180), width=1)
-        draw_road.line([(0, i), (32, i)], fill=(180, 180, 180), width=1)
-
-    for y in range(MAP_HEIGHT):
-        for x in range(MAP_WIDTH):
-            px = x * TILE_SIZE
-            py = y * TILE_SIZE
-            tile_type = ground[y][x]
-
-            if tile_type == ROAD:
-                img.paste(road_tile, (px, py))
-            else:
-                tile = Image.new("RGBA", (32, 32), colors[tile_type])
-                img.paste(tile, (px, py))
+    # Zone overlays blend whole cells, selected on the tile view
+    cells = tile_cells(pixels)
+    for zone_name, zone_cells in zone_cell_masks().items():
+        blend_color(cells, zone_cells & (ground == GRASS), ZONE_COLORS[zone_name])
 
-    for zone_name, bounds in ZONE_BOUNDS.items():
-        color = zone_colors[zone_name]
-        for y in range(bounds["y"], bounds["y"] + bounds["height"]):
-            for x in range(bounds["x"], bounds["x"] + bounds["width"]):
-                if 0 <= y < MAP_HEIGHT and 0 <= x < MAP_WIDTH:
-                    if ground[y][x] == GRASS:
-                        px = x * TILE_SIZE
-                        py = y * TILE_SIZE
-                        overlay = Image.new("RGBA", (32, 32), color)
-                        img.paste(overlay, (px, py), overlay)
+    img = Image.fromarray(pixels)
 
     draw = ImageDraw.Draw(img)
 
@@ -157,10 +239,7 @@ def render_visual_map(ground, collision):
             [zx, zy, zx + zw - 1, zy + zh - 1], outline=boundary_color, width=4
         )
 
-    try:
-        font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 18)
-    except:
-        font = ImageFont.load_default()
+    font = load_font(18)
 
     for zone_name, bounds in ZONE_BOUNDS.items():
         zx = bounds["x"] * TILE_SIZE
@@ -168,18 +247,19 @@ def render_visual_map(ground, collision):
         zw = bounds["width"] * TILE_SIZE
         zh = bounds["height"] * TILE_SIZE
 
-        label = zone_name.upper().replace("-", "\n")
-        bbox = draw.textbbox((0, 0), label, font=font)
-        text_width = bbox[2] - bbox[0]
-        text_height = bbox[3] - bbox[1]
+        text = zone_name.upper().replace("-", "\n")
+        label, text_width, text_height = render_label(text, font, 4, (0, 0, 0, 200), (255, 255, 255))
         text_x = zx + (zw - text_width) // 2
         text_y = zy + (zh - text_height) // 2
 
-        draw.rectangle(
-            [text_x - 4, text_y - 4, text_x + text_width + 4, text_y + text_height + 4],
-            fill=(0, 0, 0, 200),
-        )
-        draw.text((text_x, text_y), label, fill=(255, 255, 255), font=font)
+        if label is not None:
+            img.paste(label, (text_x - 4, text_y - 4))
+        else:
+            draw.rectangle(
+                [text_x - 4, text_y - 4, text_x + text_width + 4, text_y + text_height + 4],
+                fill=(0, 0, 0, 200),
+            )
+            draw.text((text_x, text_y), text, fill=(255, 255, 255), font=font)
 
         spawn = bounds["spawn"]
         sx = spawn[0] * TILE_SIZE + TILE_SIZE // 2
@@ -188,55 +268,16 @@ def render_visual_map(ground, collision):
             [sx - 8, sy - 8, sx + 8, sy + 8], fill=(255, 255, 0, 200), outline=(0, 0, 0)
         )
 
-    for y in range(MAP_HEIGHT + 1):
-        draw.line(
-            [(0, y * TILE_SIZE), (img_width, y * TILE_SIZE)],
-            fill=(60, 60, 60, 80),
-            width=1,
-        )
-    for x in range(MAP_WIDTH + 1):
-        draw.line(
-            [(x * TILE_SIZE, 0), (x * TILE_SIZE, img_height)],
-            fill=(60, 60, 60, 80),
-            width=1,
-        )
-
-    return img
+    pixels = np.array(img)
+    draw_grid(pixels, (60, 60, 60, 80))
+    return Image.fromarray(pixels)
 
 
 def render_collision_map(collision):
-    img_width = MAP_WIDTH * TILE_SIZE
-    img_height = MAP_HEIGHT * TILE_SIZE
-    img = Image.new("RGBA", (img_width, img_height))
-
-    walkable = Image.new("RGBA", (32, 32), (0, 255, 0, 100))
-    blocked = Image.new("RGBA", (32, 32), (255, 0, 0, 150))
-
-    for y in range(MAP_HEIGHT):
-        for x in range(MAP_WIDTH):
-            px = x * TILE_SIZE
-            py = y * TILE_SIZE
-
-            if collision[y][x] == 0:
-                img.paste(walkable, (px, py))
-            else:
-                img.paste(blocked, (px, py))
-
-    draw = ImageDraw.Draw(img)
-    for y in range(MAP_HEIGHT + 1):
-        draw.line(
-            [(0, y * TILE_SIZE), (img_width, y * TILE_SIZE)],
-            fill=(100, 100, 100, 150),
-            width=1,
-        )
-    for x in range(MAP_WIDTH + 1):
-        draw.line(
-            [(x * TILE_SIZE, 0), (x * TILE_SIZE, img_height)],
-            fill=(100, 100, 100, 150),
-            width=1,
-        )
-
-    return img
+    cells = COLLISION_COLORS[np.asarray(collision)]
+    pixels = cells.repeat(TILE_SIZE, axis=0).repeat(TILE_SIZE, axis=1)
+    draw_grid(pixels, (100, 100, 100, 150))
+    return Image.fromarray(pixels)
 
 
 def create_combined_preview(visual, collision_overlay):
@@ -244,10 +285,7 @@ def create_combined_preview(visual, collision_overlay):
     combined = Image.alpha_composite(combined, collision_overlay)
 
     draw = ImageDraw.Draw(combined)
-    try:
-        font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 14)
-    except:
-        font = ImageFont.load_default()
+    font = load_font(14)
 
     legend_x = 10
     legend_y = combined.height - 80
@@ -284,6 +322,22 @@ def create_combined_preview(visual, collision_overlay):
     return combined
 
 
+def write_map_data(path, header, grids):
+    """Write header plus the grids as one JSON object, streaming a row at a time.
+
+    Produces the same text as json.dump of the header with each grid's
+    .tolist() appended, without building the nested lists.
+    """
+    with open(path, "w") as f:
+        f.write(json.dumps(header)[:-1])
+        for name, grid in grids.items():
+            f.write(f", {json.dumps(name)}: [")
+            for i, row in enumerate(grid):
+                f.write(("[" if i == 0 else ", [") + ", ".join(map(str, row.tolist())) + "]")
+            f.write("]")
+        f.write("}")
+
+
 def main():
     output_dir = "assets/extracted/visualization"
     os.makedirs(output_dir, exist_ok=True)
@@ -291,15 +345,15 @@ def main():
     ground, collision = create_tile_map()
 
     visual_map = render_visual_map(ground, collision)
-    visual_map.save(f"{output_dir}/village_map_with_roads.png")
+    visual_map.save(f"{output_dir}/village_map_with_roads.png", **PNG_SAVE_KWARGS)
     print(f"Visual map saved to {output_dir}/village_map_with_roads.png")
 
     collision_map = render_collision_map(collision)
-    collision_map.save(f"{output_dir}/collision_overlay.png")
+    collision_map.save(f"{output_dir}/collision_overlay.png", **PNG_SAVE_KWARGS)
     print(f"Collision overlay saved to {output_dir}/collision_overlay.png")
 
     combined = create_combined_preview(visual_map, collision_map)
-    combined.save(f"{output_dir}/combined_preview.png")
+    combined.save(f"{output_dir}/combined_preview.png", **PNG_SAVE_KWARGS)
     print(f"Combined preview saved to {output_dir}/combined_preview.png")
 
     map_data = {
@@ -307,20 +361,17 @@ def main():
         "height": MAP_HEIGHT,
         "tileSize": TILE_SIZE,
         "zones": ZONE_BOUNDS,
-        "ground": ground,
-        "collision": collision,
     }
 
-    with open(f"{output_dir}/map_data.json", "w") as f:
-        json.dump(map_data, f)
+    write_map_data(f"{output_dir}/map_data.json", map_data, {"ground": ground, "collision": collision})
     print(f"Map data saved to {output_dir}/map_data.json")
 
     print(
         f"\nMap size: {MAP_WIDTH}x{MAP_HEIGHT} tiles ({MAP_WIDTH * TILE_SIZE}x{MAP_HEIGHT * TILE_SIZE} px)"
     )
 
-    walkable_count = sum(row.count(0) for row in collision)
-    blocked_count = sum(row.count(1) for row in collision)
+    walkable_count = int(np.count_nonzero(collision == 0))
+    blocked_count = collision.size - walkable_count
     print(f"Walkable tiles: {walkable_count}")
     print(f"Blocked tiles: {blocked_count}")
 
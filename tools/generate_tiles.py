@@ -19,16 +19,19 @@ Usage:
 """
 
 import argparse
+import functools
+import hashlib
 import json
 import math
 import os
 import sys
 from colorsys import hsv_to_rgb, rgb_to_hsv
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
 try:
-    from PIL import Image, ImageDraw
+    from PIL import Image
 except ImportError:
     print("Error: Pillow is required. Install with: pip install Pillow")
     sys.exit(1)
@@ -39,6 +42,23 @@ except ImportError:
     print("Error: numpy is required. Install with: pip install numpy")
     sys.exit(1)
 
+from extract_utils import njit_or_none
+
+# optional: fused Scale2x/Scale3x and HSV shift kernels for large sheets.
+# Bound by extract_utils.njit_or_none on first use only (see
+# load_scale_kernels, load_hsv_kernel), since importing numba is slow. The
+# kernels' prange loops use numba's default threading layer; set
+# NUMBA_THREADING_LAYER=omp to share an OpenMP pool with other native code.
+numba = None
+
+# Below this many source pixels the NumPy scalers beat calling the JIT kernels
+SCALE_JIT_MIN_PIXELS = 256 * 256
+
+# Below this many pixels importing numba costs more than the NumPy HSV shift
+HSV_JIT_MIN_PIXELS = 128 * 128
+
+PALETTE_CACHE_DIR = Path(__file__).parent / ".cache" / "palettes"
+
 
 # =============================================================================
 # Bayer Dithering Matrices
@@ -109,11 +129,121 @@ BLOB47_CATEGORIES = {
     241: "nsw_both", 199: "new_both",
 }
 
+# Category bitmasks in sheet order, and a bitmask-indexed name table (None for
+# configurations without a dedicated tile), built once at import
+BLOB47_KEYS_SORTED = tuple(sorted(BLOB47_CATEGORIES))
+BLOB47_TABLE = tuple(BLOB47_CATEGORIES.get(bitmask) for bitmask in range(256))
+
+# Bitmask -> slot in the autotile47 sheet (categories in bitmask order), or -1
+# for configurations without a dedicated tile. Index with compute_bitmask_grid
+# output to map a whole grid at once.
+BLOB47_SHEET_INDEX = np.full(256, -1, dtype=np.int16)
+BLOB47_SHEET_INDEX[list(BLOB47_KEYS_SORTED)] = np.arange(len(BLOB47_KEYS_SORTED))
+
+
+# =============================================================================
+# Output
+# =============================================================================
+
+def save_images(images: List[Tuple[Image.Image, str]]) -> None:
+    """Save (image, path) pairs concurrently.
+
+    PNG encoding is zlib work that releases the GIL inside Pillow, so a set of
+    tiles compresses in parallel on a thread pool.
+    """
+    with ThreadPoolExecutor() as pool:
+        # Consume the iterator so save errors propagate
+        for _ in pool.map(lambda item: item[0].save(item[1]), images):
+            pass
+
 
 # =============================================================================
 # Vectorized Scale2x (EPX) - ~50x faster than pixel loop
 # =============================================================================
 
+def _tile_pixels(tile: Image.Image) -> np.ndarray:
+    """Return an RGBA tile as an (H, W) uint32 array, one word per pixel.
+
+    Comparing packed pixels is a single integer compare instead of an
+    all-channels reduction over an (H, W, 4) array.
+    """
+    if tile.mode != "RGBA":
+        tile = tile.convert("RGBA")
+    return np.ascontiguousarray(tile).view(np.uint32)[:, :, 0]
+
+
+def _pixels_to_image(pixels: np.ndarray) -> Image.Image:
+    """Inverse of ``_tile_pixels``."""
+    return Image.fromarray(pixels.view(np.uint8).reshape(*pixels.shape, 4))
+
+
+def _scale2x_kernel(pix, out):
+    h, w = pix.shape
+    for y in numba.prange(h):
+        yu, yd = max(y - 1, 0), min(y + 1, h - 1)
+        for x in range(w):
+            xl, xr = max(x - 1, 0), min(x + 1, w - 1)
+            P, A, B, C, D = pix[y, x], pix[yu, x], pix[y, xr], pix[y, xl], pix[yd, x]
+            out[2 * y, 2 * x] = C if C == A and C != D and A != B else P
+            out[2 * y, 2 * x + 1] = A if A == B and A != C and B != D else P
+            out[2 * y + 1, 2 * x] = D if D == C and D != B and C != A else P
+            out[2 * y + 1, 2 * x + 1] = B if B == D and B != A and D != C else P
+
+
+def _scale3x_kernel(pix, out):
+    h, w = pix.shape
+    for y in numba.prange(h):
+        yu, yd = max(y - 1, 0), min(y + 1, h - 1)
+        for x in range(w):
+            xl, xr = max(x - 1, 0), min(x + 1, w - 1)
+            A, B, C = pix[yu, xl], pix[yu, x], pix[yu, xr]
+            D, E, F = pix[y, xl], pix[y, x], pix[y, xr]
+            G, H, I = pix[yd, xl], pix[yd, x], pix[yd, xr]
+            tl = D == B and D != H and B != F
+            tr = B == F and B != D and F != H
+            bl = D == H and D != B and H != F
+            br = F == H and F != B and H != D
+            oy, ox = 3 * y, 3 * x
+            out[oy, ox] = D if tl else E
+            out[oy, ox + 1] = B if (tl and E != C) or (tr and E != A) else E
+            out[oy, ox + 2] = F if tr else E
+            out[oy + 1, ox] = D if (tl and E != G) or (bl and E != A) else E
+            out[oy + 1, ox + 1] = E
+            out[oy + 1, ox + 2] = F if (tr and E != I) or (br and E != C) else E
+            out[oy + 2, ox] = D if bl else E
+            out[oy + 2, ox + 1] = H if (bl and E != I) or (br and E != G) else E
+            out[oy + 2, ox + 2] = F if br else E
+
+
+@functools.lru_cache(maxsize=None)
+def load_scale_kernels():
+    """Return numba-compiled (scale2x, scale3x) kernels, or None if numba isn't installed.
+
+    Each kernel makes one fused pass over packed uint32 pixels, comparing
+    neighbors as scalars instead of building full-size boolean temporaries.
+    """
+    scale2x = njit_or_none(_scale2x_kernel)
+    if scale2x is None:
+        return None
+    return scale2x, njit_or_none(_scale3x_kernel)
+
+
+def _pad_edge(pixels: np.ndarray) -> np.ndarray:
+    """Pad a 2-D pixel array by one replicated edge pixel on every side.
+
+    Same result as ``np.pad(pixels, 1, mode="edge")`` with four slice copies,
+    skipping np.pad's generic dispatch, which dominates on small tiles.
+    """
+    h, w = pixels.shape
+    padded = np.empty((h + 2, w + 2), dtype=pixels.dtype)
+    padded[1:-1, 1:-1] = pixels
+    padded[0, 1:-1] = pixels[0]
+    padded[-1, 1:-1] = pixels[-1]
+    padded[:, 0] = padded[:, 1]
+    padded[:, -1] = padded[:, -2]
+    return padded
+
+
 def _scale2x_vectorized(tile: Image.Image) -> Image.Image:
     """
     Vectorized EPX/Scale2X using NumPy array operations.
@@ -125,14 +255,17 @@ def _scale2x_vectorized(tile: Image.Image) -> Image.Image:
       P2(bottom-left)  = D if D==C and D!=B and C!=A else P
       P3(bottom-right) = B if B==D and B!=A and D!=C else P
     """
-    if tile.mode != "RGBA":
-        tile = tile.convert("RGBA")
+    arr = _tile_pixels(tile)  # (H, W) packed RGBA
+    h, w = arr.shape
 
-    arr = np.array(tile)  # (H, W, 4)
-    h, w = arr.shape[:2]
+    kernels = load_scale_kernels() if arr.size >= SCALE_JIT_MIN_PIXELS else None
+    if kernels is not None:
+        result = np.empty((h * 2, w * 2), dtype=np.uint32)
+        kernels[0](arr, result)
+        return _pixels_to_image(result)
 
     # Pad array for neighbor access (replicate edge pixels)
-    padded = np.pad(arr, ((1, 1), (1, 1), (0, 0)), mode="edge")
+    padded = _pad_edge(arr)
 
     # Extract neighbor arrays (all same shape as original)
     P = arr                           # center
@@ -141,44 +274,19 @@ def _scale2x_vectorized(tile: Image.Image) -> Image.Image:
     C = padded[1:-1, :-2]             # left
     D = padded[2:, 1:-1]              # bottom
 
-    # Vectorized equality checks (all channels must match)
-    def eq(x, y):
-        return np.all(x == y, axis=-1, keepdims=True)
-
-    def neq(x, y):
-        return ~np.all(x == y, axis=-1, keepdims=True)
-
-    ca = eq(C, A)
-    cd = neq(C, D)
-    ab = neq(A, B)
-
-    ab_eq = eq(A, B)
-    ac = neq(A, C)
-    bd = neq(B, D)
-
-    dc = eq(D, C)
-    db = neq(D, B)
-    # ca already computed, reuse
-    ca_neq = neq(C, A)
-
-    bd_eq = eq(B, D)
-    ba = neq(B, A)
-    dc_neq = neq(D, C)
+    ca = C == A
+    cd = C != D
+    ab = A != B
+    bd = B != D
 
-    # Scale2x output pixels
-    P0 = np.where(ca & cd & ab, C, P)
-    P1 = np.where(ab_eq & ac & bd, A, P)
-    P2 = np.where(dc & db & ca_neq, D, P)
-    P3 = np.where(bd_eq & ba & dc_neq, B, P)
+    # Scale2x output pixels, interleaved into the 2x output
+    result = np.empty((h * 2, w * 2), dtype=np.uint32)
+    result[0::2, 0::2] = np.where(ca & cd & ab, C, P)
+    result[0::2, 1::2] = np.where(~ab & ~ca & bd, A, P)
+    result[1::2, 0::2] = np.where(~cd & (D != B) & ~ca, D, P)
+    result[1::2, 1::2] = np.where(~bd & ab & cd, B, P)
 
-    # Interleave into 2x output
-    result = np.zeros((h * 2, w * 2, 4), dtype=np.uint8)
-    result[0::2, 0::2] = P0
-    result[0::2, 1::2] = P1
-    result[1::2, 0::2] = P2
-    result[1::2, 1::2] = P3
-
-    return Image.fromarray(result)
+    return _pixels_to_image(result)
 
 
 def _scale3x_vectorized(tile: Image.Image) -> Image.Image:
@@ -188,13 +296,16 @@ def _scale3x_vectorized(tile: Image.Image) -> Image.Image:
     Uses 3x3 neighborhood analysis to produce 9 output pixels per input pixel.
     Follows AdvMAME3x rules for proper corner/edge detection.
     """
-    if tile.mode != "RGBA":
-        tile = tile.convert("RGBA")
+    arr = _tile_pixels(tile)
+    h, w = arr.shape
 
-    arr = np.array(tile)
-    h, w = arr.shape[:2]
+    kernels = load_scale_kernels() if arr.size >= SCALE_JIT_MIN_PIXELS else None
+    if kernels is not None:
+        result = np.empty((h * 3, w * 3), dtype=np.uint32)
+        kernels[1](arr, result)
+        return _pixels_to_image(result)
 
-    padded = np.pad(arr, ((1, 1), (1, 1), (0, 0)), mode="edge")
+    padded = _pad_edge(arr)
 
     # 3x3 neighborhood: A B C / D E F / G H I
     A = padded[:-2, :-2]   # top-left
@@ -207,49 +318,40 @@ def _scale3x_vectorized(tile: Image.Image) -> Image.Image:
     H = padded[2:, 1:-1]   # bottom
     I = padded[2:, 2:]     # bottom-right
 
-    def eq(x, y):
-        return np.all(x == y, axis=-1, keepdims=True)
-
-    def neq(x, y):
-        return ~np.all(x == y, axis=-1, keepdims=True)
+    # Scale3x rules (AdvMAME3x); each neighbor pair is compared once
+    db = D == B
+    dh = D == H
+    bf = B == F
+    fh = F == H
+    ea, ec, eg, ei = E != A, E != C, E != G, E != I
 
-    # Scale3x rules (AdvMAME3x)
-    db = eq(D, B)
-    dh = neq(D, H)
-    bf = neq(B, F)
+    corner_tl = db & ~dh & ~bf      # D==B && D!=H && B!=F
+    corner_tr = bf & ~db & ~fh      # B==F && B!=D && F!=H
+    corner_bl = dh & ~db & ~fh      # D==H && D!=B && H!=F
+    corner_br = fh & ~bf & ~dh      # F==H && F!=B && H!=D
 
-    bf_eq = eq(B, F)
-
-    fh = eq(F, H)
-
-    dh_eq = eq(D, H)
-
-    result = np.zeros((h * 3, w * 3, 4), dtype=np.uint8)
+    result = np.empty((h * 3, w * 3), dtype=np.uint32)
 
     # P1 (0,0): D==B && D!=H && B!=F ? D : E
-    result[0::3, 0::3] = np.where(db & dh & bf, D, E)
+    result[0::3, 0::3] = np.where(corner_tl, D, E)
     # P2 (0,1): (D==B && D!=H && B!=F && E!=C) || (B==F && B!=D && F!=H && E!=A) ? B : E
-    cond_p2 = (db & dh & bf & neq(E, C)) | (bf_eq & neq(B, D) & neq(F, H) & neq(E, A))
-    result[0::3, 1::3] = np.where(cond_p2, B, E)
+    result[0::3, 1::3] = np.where((corner_tl & ec) | (corner_tr & ea), B, E)
     # P3 (0,2): B==F && B!=D && F!=H ? F : E
-    result[0::3, 2::3] = np.where(bf_eq & neq(B, D) & neq(F, H), F, E)
+    result[0::3, 2::3] = np.where(corner_tr, F, E)
     # P4 (1,0): (D==B && D!=H && B!=F && E!=G) || (D==H && D!=B && H!=F && E!=A) ? D : E
-    cond_p4 = (db & dh & bf & neq(E, G)) | (dh_eq & neq(D, B) & neq(H, F) & neq(E, A))
-    result[1::3, 0::3] = np.where(cond_p4, D, E)
+    result[1::3, 0::3] = np.where((corner_tl & eg) | (corner_bl & ea), D, E)
     # P5 (1,1): always E
     result[1::3, 1::3] = E
     # P6 (1,2): (B==F && B!=D && F!=H && E!=I) || (F==H && F!=B && H!=D && E!=C) ? F : E
-    cond_p6 = (bf_eq & neq(B, D) & neq(F, H) & neq(E, I)) | (fh & neq(F, B) & neq(H, D) & neq(E, C))
-    result[1::3, 2::3] = np.where(cond_p6, F, E)
+    result[1::3, 2::3] = np.where((corner_tr & ei) | (corner_br & ec), F, E)
     # P7 (2,0): D==H && D!=B && H!=F ? D : E
-    result[2::3, 0::3] = np.where(dh_eq & neq(D, B) & neq(H, F), D, E)
+    result[2::3, 0::3] = np.where(corner_bl, D, E)
     # P8 (2,1): (D==H && D!=B && H!=F && E!=I) || (F==H && F!=B && H!=D && E!=G) ? H : E
-    cond_p8 = (dh_eq & neq(D, B) & neq(H, F) & neq(E, I)) | (fh & neq(F, B) & neq(H, D) & neq(E, G))
-    result[2::3, 1::3] = np.where(cond_p8, H, E)
+    result[2::3, 1::3] = np.where((corner_bl & ei) | (corner_br & eg), H, E)
     # P9 (2,2): F==H && F!=B && H!=D ? F : E
-    result[2::3, 2::3] = np.where(fh & neq(F, B) & neq(H, D), F, E)
+    result[2::3, 2::3] = np.where(corner_br, F, E)
 
-    return Image.fromarray(result)
+    return _pixels_to_image(result)
 
 
 # =============================================================================
@@ -323,20 +425,44 @@ def batch_resize_tilemap(
 
     out_w = cols * to_size
     out_h = rows * to_size
-    output = Image.new("RGBA", (out_w, out_h), (0, 0, 0, 0))
-
-    resized_count = 0
-    for row in range(rows):
-        for col in range(cols):
+    src = np.asarray(img)
+    out = np.zeros((out_h, out_w, 4), dtype=np.uint8)
+
+    if method == "nearest" and to_size % from_size == 0:
+        # Integer nearest-neighbor scaling is pixel repetition: gather every
+        # tile without its spacing gutter, then broadcast each pixel into its
+        # factor x factor block of the output. Writing through a block view of
+        # the output skips the two output-sized temporaries of np.repeat, so
+        # peak memory is the output plus one source-sized gather.
+        offsets = np.arange(from_size)
+        ys = (np.arange(rows)[:, np.newaxis] * from_step + offsets).ravel()
+        xs = (np.arange(cols)[:, np.newaxis] * from_step + offsets).ravel()
+        factor = to_size // from_size
+        blocks = out.reshape(len(ys), factor, len(xs), factor, 4)
+        blocks[:] = src[ys[:, np.newaxis], xs][:, np.newaxis, :, np.newaxis]
+    else:
+        # Slice tiles out of one source array and write results into one
+        # destination array instead of cropping and pasting Pillow images.
+        # The scalers spend their time in NumPy/Pillow calls that release the
+        # GIL, so tiles are resized on a thread pool; each writes its own slot.
+        def resize_cell(cell: Tuple[int, int]) -> None:
+            row, col = cell
             x = col * from_step
             y = row * from_step
-            tile = img.crop((x, y, x + from_size, y + from_size))
+            tile = Image.fromarray(src[y:y + from_size, x:x + from_size])
             scaled = resize_tile(tile, to_size, method)
-            output.paste(scaled, (col * to_size, row * to_size))
-            resized_count += 1
+            out_y, out_x = row * to_size, col * to_size
+            out[out_y:out_y + to_size, out_x:out_x + to_size] = np.asarray(scaled)
+
+        cells = [(row, col) for row in range(rows) for col in range(cols)]
+        with ThreadPoolExecutor() as pool:
+            # Consume the iterator so worker exceptions propagate
+            for _ in pool.map(resize_cell, cells):
+                pass
+    resized_count = rows * cols
 
     os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
-    output.save(output_path)
+    Image.fromarray(out).save(output_path)
     print(f"Resized {resized_count} tiles: {from_size}x{from_size} -> {to_size}x{to_size}")
     print(f"Output: {output_path} ({out_w}x{out_h})")
 
@@ -356,6 +482,7 @@ def batch_resize_tilemap(
 # Bayer Dithered Transitions
 # =============================================================================
 
+@functools.lru_cache(maxsize=128)
 def create_bayer_mask(
     width: int,
     height: int,
@@ -368,6 +495,9 @@ def create_bayer_mask(
     Unlike smooth gradients that create blurry transitions, Bayer dithering
     produces crisp, pixel-art-appropriate pattern transitions.
 
+    Autotile sets request the same few quadrant masks for every tile, so
+    masks are memoized per arguments and returned read-only.
+
     Args:
         width: Mask width
         height: Mask height
@@ -379,50 +509,56 @@ def create_bayer_mask(
     bayer = matrices.get(matrix_size, BAYER_4X4)
     bh, bw = bayer.shape
 
-    # Create tiled threshold matrix
-    threshold = np.tile(bayer, (
-        math.ceil(height / bh),
-        math.ceil(width / bw),
-    ))[:height, :width]
+    # Gradients are built as broadcastable row/column/grid expressions and
+    # only expand to (height, width) in the final threshold compare
+    ys, xs = np.ogrid[:height, :width]
 
-    # Create smooth gradient base
-    gradient = np.zeros((height, width), dtype=np.float64)
+    # Tiled threshold matrix
+    threshold = bayer[ys % bh, xs % bw]
 
     if direction == "left":
-        gradient = np.linspace(0, 1, width)[np.newaxis, :].repeat(height, axis=0)
+        gradient = np.linspace(0, 1, width)[np.newaxis, :]
     elif direction == "right":
-        gradient = np.linspace(1, 0, width)[np.newaxis, :].repeat(height, axis=0)
+        gradient = np.linspace(1, 0, width)[np.newaxis, :]
     elif direction == "top":
-        gradient = np.linspace(0, 1, height)[:, np.newaxis].repeat(width, axis=1)
+        gradient = np.linspace(0, 1, height)[:, np.newaxis]
     elif direction == "bottom":
-        gradient = np.linspace(1, 0, height)[:, np.newaxis].repeat(width, axis=1)
+        gradient = np.linspace(1, 0, height)[:, np.newaxis]
     elif direction == "diagonal":
-        for y in range(height):
-            for x in range(width):
-                gradient[y, x] = (x + y) / max(width + height - 2, 1)
+        gradient = (xs + ys) / max(width + height - 2, 1)
     elif direction == "radial":
         cy, cx = height / 2, width / 2
         max_dist = math.sqrt(cx**2 + cy**2)
-        for y in range(height):
-            for x in range(width):
-                dist = math.sqrt((x - cx)**2 + (y - cy)**2)
-                gradient[y, x] = dist / max_dist
+        gradient = np.sqrt((xs - cx)**2 + (ys - cy)**2) / max_dist
     elif direction.startswith("corner_"):
         corner = direction.split("_")[1]
         oy = 0 if "t" in corner else height - 1
         ox = 0 if "l" in corner else width - 1
         max_dist = math.sqrt(width**2 + height**2)
-        for y in range(height):
-            for x in range(width):
-                dist = math.sqrt((x - ox)**2 + (y - oy)**2)
-                gradient[y, x] = dist / max_dist
+        gradient = np.sqrt((xs - ox)**2 + (ys - oy)**2) / max_dist
+    else:
+        gradient = np.zeros((1, 1))
 
     # Apply Bayer dithering: compare gradient to threshold
     mask = (gradient > threshold).astype(np.float64)
+    mask.flags.writeable = False
 
     return mask
 
 
+@functools.lru_cache(maxsize=128)
+def bayer_selector(width: int, height: int, direction: str = "left", matrix_size: int = 4) -> np.ndarray:
+    """Return a Bayer mask as packed-pixel selector words (0 or 0xFFFFFFFF).
+
+    ANDing packed RGBA pixels with it keeps whole pixels where the mask is
+    set. Cached alongside create_bayer_mask and read-only.
+    """
+    mask = create_bayer_mask(width, height, direction, matrix_size)
+    selector = np.where(mask > 0, np.uint32(0xFFFFFFFF), np.uint32(0))
+    selector.flags.writeable = False
+    return selector
+
+
 def dither_blend_tiles(
     tile_a: Image.Image,
     tile_b: Image.Image,
@@ -435,23 +571,22 @@ def dither_blend_tiles(
     Produces crisp, pixel-art-appropriate transitions instead of
     smooth alpha blending that looks blurry at low resolutions.
     """
-    a = tile_a.convert("RGBA")
-    b = tile_b.convert("RGBA")
+    a = tile_a if tile_a.mode == "RGBA" else tile_a.convert("RGBA")
+    b = tile_b if tile_b.mode == "RGBA" else tile_b.convert("RGBA")
 
     if a.size != b.size:
         b = b.resize(a.size, Image.Resampling.NEAREST)
 
     w, h = a.size
-    mask = create_bayer_mask(w, h, direction, matrix_size)
+    select_b = bayer_selector(w, h, direction, matrix_size)
 
-    arr_a = np.array(a)
-    arr_b = np.array(b)
-
-    # Binary selection: each pixel comes entirely from A or B
-    mask_4d = mask[:, :, np.newaxis].astype(bool)
-    result = np.where(mask_4d, arr_b, arr_a)
-
-    return Image.fromarray(result.astype(np.uint8))
+    # Binary selection: each pixel comes entirely from A or B. On packed
+    # pixels that is a ^ ((a ^ b) & selector), three in-place word ops
+    pix_a = _tile_pixels(a)
+    result = np.bitwise_xor(pix_a, _tile_pixels(b))
+    result &= select_b
+    result ^= pix_a
+    return _pixels_to_image(result)
 
 
 def generate_dithered_transition_set(
@@ -472,11 +607,15 @@ def generate_dithered_transition_set(
         "radial",
     ]
 
+    pending = []
     for direction in directions:
         result = dither_blend_tiles(tile_a, tile_b, direction, matrix_size)
         path = os.path.join(output_dir, f"{base_name}_dither_{direction}.png")
-        result.save(path)
+        pending.append((result, path))
         outputs.append(path)
+    save_images(pending)
+
+    for direction, path in zip(directions, outputs):
         print(f"  Dithered transition {direction}: {path}")
 
     return outputs
@@ -486,6 +625,11 @@ def generate_dithered_transition_set(
 # Palette Swap System
 # =============================================================================
 
+# Luminance term of each 5-bit quantized level for R, G and B; the products
+# are exactly those of the float expression, so the sort order is unchanged
+PALETTE_LUMA_LUT = np.array([0.299, 0.587, 0.114])[:, np.newaxis] * (np.arange(32, dtype=np.uint8) << 3)
+
+
 def extract_palette(
     tile: Image.Image,
     max_colors: int = 16,
@@ -494,7 +638,8 @@ def extract_palette(
     """
     Extract the discrete color palette from a tile.
 
-    Returns sorted list of unique colors (quantized to reduce noise).
+    Returns the unique colors (quantized to reduce noise) sorted by luminance;
+    past ``max_colors``, the most frequent colors are kept.
     """
     if tile.mode != "RGBA":
         tile = tile.convert("RGBA")
@@ -507,23 +652,92 @@ def extract_palette(
     if len(opaque_pixels) == 0:
         return []
 
-    # Quantize to reduce color count (5-bit per channel)
-    quantized = (opaque_pixels >> 3) << 3
-    unique_colors = np.unique(quantized, axis=0)
-
-    # Sort by luminance
-    luminances = 0.299 * unique_colors[:, 0] + 0.587 * unique_colors[:, 1] + 0.114 * unique_colors[:, 2]
+    # Quantize to 5 bits per channel and pack into a 15-bit key; one bincount
+    # pass gives the histogram, and its nonzero bins are the distinct colors
+    # in R, G, B order
+    levels = opaque_pixels >> 3
+    keys = (levels[:, 0].astype(np.intp) << 10) | (levels[:, 1].astype(np.intp) << 5) | levels[:, 2]
+    hist = np.bincount(keys, minlength=1 << 15)
+    keys = np.flatnonzero(hist)
+
+    # Limit to max_colors, keeping the most frequent colors (ties go to the
+    # lower key, so the choice is deterministic)
+    if len(keys) > max_colors:
+        keys = np.sort(keys[np.argsort(-hist[keys], kind="stable")[:max_colors]])
+
+    # Sort by luminance, looking up each quantized channel's weighted term
+    r, g, b = keys >> 10, (keys >> 5) & 31, keys & 31
+    luminances = PALETTE_LUMA_LUT[0, r] + PALETTE_LUMA_LUT[1, g] + PALETTE_LUMA_LUT[2, b]
     sorted_indices = np.argsort(luminances)
-    sorted_colors = unique_colors[sorted_indices]
-
-    # Limit to max_colors (take evenly spaced samples if too many)
-    if len(sorted_colors) > max_colors:
-        indices = np.linspace(0, len(sorted_colors) - 1, max_colors, dtype=int)
-        sorted_colors = sorted_colors[indices]
+    sorted_colors = (np.stack([r, g, b], axis=-1)[sorted_indices] << 3).astype(np.uint8)
 
     return [tuple(c) for c in sorted_colors.tolist()]
 
 
+# Distinct colors matched per palette_swap / normalize_palette broadcast,
+# bounding the (colors, palette) distance matrix for photo-like inputs
+PALETTE_SWAP_CHUNK = 4096
+
+
+@functools.lru_cache(maxsize=32)
+def palette_distance_tables(source_palette: Tuple[Tuple[int, int, int], ...]) -> np.ndarray:
+    """Return per-channel distance tables for a palette, shape (3, 256, entries).
+
+    ``tables[c, v, i]`` is ``|v - source_palette[i][c]|``, so the Manhattan
+    distance of a color to every entry is three row lookups and two adds.
+    Cached per palette and read-only.
+    """
+    src = np.array(source_palette, dtype=np.int16).reshape(-1, 3)
+    levels = np.arange(256, dtype=np.int16)
+    tables = np.abs(levels[np.newaxis, :, np.newaxis] - src.T[:, np.newaxis, :]).astype(np.uint16)
+    tables.setflags(write=False)
+    return tables
+
+
+@functools.lru_cache(maxsize=32)
+def palette_sq_distance_tables(palette: Tuple[Tuple[float, float, float], ...]) -> np.ndarray:
+    """Return per-channel squared-distance tables for a palette, shape (3, 256, entries).
+
+    ``tables[c, v, i]`` is ``(palette[i][c] - v) ** 2``, so the squared
+    Euclidean distance of a color to every entry is three row lookups and two
+    adds. Cached per palette and read-only.
+    """
+    ref = np.array(palette, dtype=np.float64).reshape(-1, 3)
+    levels = np.arange(256, dtype=np.float64)
+    tables = (ref.T[:, np.newaxis, :] - levels[np.newaxis, :, np.newaxis]) ** 2
+    tables.setflags(write=False)
+    return tables
+
+
+@functools.lru_cache(maxsize=32)
+def palette_bucket_lut(palette: Tuple[Tuple[float, float, float], ...]) -> np.ndarray:
+    """Return the nearest palette index for each 5-bit quantized RGB bucket.
+
+    Indexed by ``(r >> 3) << 10 | (g >> 3) << 5 | b >> 3``. An entry is set
+    only when one palette color is strictly nearest to every color in the
+    8x8x8 bucket, i.e. when no other color's closest approach to the bucket
+    is within the farthest distance of the best one; otherwise it is -1 and
+    the caller must search. Cached per palette and read-only.
+    """
+    ref = np.array(palette, dtype=np.float64).reshape(-1, 3)
+    lo = np.arange(32, dtype=np.float64)[:, np.newaxis] * 8
+    hi = lo + 7
+    # Per channel and bucket level, the squared nearest and farthest distance
+    # from each palette entry to the bucket's range, shape (3, 32, entries)
+    channels = ref.T[:, np.newaxis, :]
+    near = np.maximum(np.maximum(lo - channels, channels - hi), 0) ** 2
+    far = np.maximum(np.abs(lo - channels), np.abs(hi - channels)) ** 2
+    near = near[0][:, None, None] + near[1][None, :, None] + near[2][None, None, :]
+    far = far[0][:, None, None] + far[1][None, :, None] + far[2][None, None, :]
+    near = near.reshape(1 << 15, -1)
+    far = far.reshape(1 << 15, -1)
+
+    candidates = near <= far.min(axis=1, initial=np.inf)[:, np.newaxis]
+    lut = np.where(candidates.sum(axis=1) == 1, candidates.argmax(axis=1), -1).astype(np.int16)
+    lut.setflags(write=False)
+    return lut
+
+
 def palette_swap(
     tile: Image.Image,
     source_palette: List[Tuple[int, int, int]],
@@ -545,23 +759,26 @@ def palette_swap(
             f"Palette size mismatch: source={len(source_palette)}, target={len(target_palette)}"
         )
 
-    arr = np.array(tile).copy()
-    h, w = arr.shape[:2]
-
-    # Build lookup: for each source color, find all matching pixels
-    src_arr = np.array(source_palette, dtype=np.int16)
-    tgt_arr = np.array(target_palette, dtype=np.uint8)
+    red, green, blue = palette_distance_tables(tuple(map(tuple, source_palette)))
+    tgt_arr = np.array(target_palette, dtype=np.uint8).reshape(-1, 3)
 
-    rgb = arr[:, :, :3].astype(np.int16)
-    alpha = arr[:, :, 3]
+    # Match each distinct color against every palette entry in one broadcast,
+    # then scatter the results back to the pixels
+    arr = np.ascontiguousarray(tile)
+    colors, inverse = np.unique(arr.view(np.uint32).ravel(), return_inverse=True)
+    colors = colors.view(np.uint8).reshape(-1, 4).copy()
 
-    for i in range(len(source_palette)):
-        # Manhattan distance to this palette entry
-        diff = np.abs(rgb - src_arr[i]).sum(axis=-1)
-        mask = (diff <= tolerance) & (alpha >= 50)
-        arr[mask, :3] = tgt_arr[i]
+    for start in range(0, len(colors) if len(tgt_arr) else 0, PALETTE_SWAP_CHUNK):
+        chunk = colors[start:start + PALETTE_SWAP_CHUNK]
+        # Manhattan distance to each palette entry, shape (colors, palette)
+        diff = red[chunk[:, 0]] + green[chunk[:, 1]] + blue[chunk[:, 2]]
+        within = diff <= tolerance
+        # A color within tolerance of several entries takes the last one
+        last = within.shape[1] - 1 - within[:, ::-1].argmax(axis=1)
+        swap = within.any(axis=1) & (chunk[:, 3] >= 50)
+        chunk[swap, :3] = tgt_arr[last[swap]]
 
-    return Image.fromarray(arr)
+    return Image.fromarray(colors[inverse.ravel()].reshape(arr.shape))
 
 
 def generate_palette_variants(
@@ -629,6 +846,30 @@ def load_palette_json(path: str) -> List[Tuple[int, int, int]]:
 # 47-Tile Bitmask Autotiling
 # =============================================================================
 
+# Neighbor directions in bit order: edges on even bits, corners on odd bits
+BITMASK_DIRECTIONS = ("N", "NE", "E", "SE", "S", "SW", "W", "NW")
+
+
+def _gate_corners(raw: int) -> int:
+    """Clear each corner bit of a raw neighbor bitmask unless both adjacent edges are set."""
+    bitmask = raw & 0b01010101
+    for bit in (1, 3, 5, 7):
+        edges = (1 << (bit - 1)) | (1 << ((bit + 1) % 8))
+        if raw & (1 << bit) and raw & edges == edges:
+            bitmask |= 1 << bit
+    return bitmask
+
+
+# Raw neighbor bitmask (every direction's bit set as-is) -> effective bitmask
+BITMASK_GATE = np.array([_gate_corners(raw) for raw in range(256)], dtype=np.uint8)
+_BITMASK_GATE_TABLE = tuple(BITMASK_GATE.tolist())
+
+
+def compute_bitmask_fast(raw: int) -> int:
+    """Gate the corners of a raw 8-bit neighbor bitmask (N=1 ... NW=128) by table lookup."""
+    return _BITMASK_GATE_TABLE[raw]
+
+
 def compute_bitmask(neighbor_map: Dict[str, bool]) -> int:
     """
     Compute 8-bit bitmask from neighbor presence map.
@@ -636,54 +877,46 @@ def compute_bitmask(neighbor_map: Dict[str, bool]) -> int:
     Neighbor positions: N, NE, E, SE, S, SW, W, NW
     Corners (NE, SE, SW, NW) only count if both adjacent edges are present.
     """
-    n = neighbor_map.get("N", False)
-    ne = neighbor_map.get("NE", False)
-    e = neighbor_map.get("E", False)
-    se = neighbor_map.get("SE", False)
-    s = neighbor_map.get("S", False)
-    sw = neighbor_map.get("SW", False)
-    w = neighbor_map.get("W", False)
-    nw = neighbor_map.get("NW", False)
-
-    # Corners only matter if both adjacent edges are present
-    effective_ne = ne and n and e
-    effective_se = se and s and e
-    effective_sw = sw and s and w
-    effective_nw = nw and n and w
-
-    bitmask = 0
-    if n: bitmask |= 1
-    if effective_ne: bitmask |= 2
-    if e: bitmask |= 4
-    if effective_se: bitmask |= 8
-    if s: bitmask |= 16
-    if effective_sw: bitmask |= 32
-    if w: bitmask |= 64
-    if effective_nw: bitmask |= 128
-
-    return bitmask
+    raw = 0
+    for bit, direction in enumerate(BITMASK_DIRECTIONS):
+        if neighbor_map.get(direction, False):
+            raw |= 1 << bit
+    return _BITMASK_GATE_TABLE[raw]
 
 
-def generate_autotile47_tile(
-    center_tile: Image.Image,
-    bg_tile: Image.Image,
-    bitmask: int,
-    matrix_size: int = 4,
-) -> Image.Image:
+def compute_bitmask_grid(grid: np.ndarray) -> np.ndarray:
     """
-    Generate a single autotile for the given bitmask configuration.
+    Compute the 8-bit bitmask of every cell in a presence grid at once.
 
-    Uses quadrant-based compositing: each tile is divided into 4 quadrants,
-    and each quadrant is either center or background based on the bitmask.
+    Vectorized counterpart of compute_bitmask: each neighbor direction is a
+    shifted slice of the padded grid (cells past the edge count as absent),
+    packed into a raw bitmask whose corners are then gated through
+    BITMASK_GATE. Returns a uint8 array of the same shape as ``grid``.
     """
-    center = center_tile.convert("RGBA")
-    bg = bg_tile.convert("RGBA")
+    p = np.pad(np.asarray(grid, dtype=bool), 1)
+    n, s = p[:-2, 1:-1], p[2:, 1:-1]
+    w, e = p[1:-1, :-2], p[1:-1, 2:]
+    ne, se = p[:-2, 2:], p[2:, 2:]
+    sw, nw = p[2:, :-2], p[:-2, :-2]
 
-    if bg.size != center.size:
-        bg = bg.resize(center.size, Image.Resampling.NEAREST)
+    raw = np.zeros(n.shape, dtype=np.uint8)
+    for bit, present in enumerate((n, ne, e, se, s, sw, w, nw)):
+        raw |= present.astype(np.uint8) << bit
+    return BITMASK_GATE[raw]
 
-    w, h = center.size
-    half_w, half_h = w // 2, h // 2
+
+@functools.lru_cache(maxsize=256)
+def autotile47_mask(bitmask: int, width: int, height: int, matrix_size: int = 4) -> np.ndarray:
+    """
+    Return the (height, width) bool mask of an autotile: True where the
+    background shows, False where the center tile does.
+
+    Each quadrant is solid center if surrounded, solid bg if exposed. An inner
+    corner (both edges, no diagonal) dithers its corner toward bg; a single
+    edge dithers so that center dominates the connected side. Cached per
+    configuration and read-only.
+    """
+    half_w, half_h = width // 2, height // 2
 
     # Parse bitmask edges
     has_n = bool(bitmask & 1)
@@ -695,131 +928,92 @@ def generate_autotile47_tile(
     has_w = bool(bitmask & 64)
     has_nw = bool(bitmask & 128)
 
-    result = Image.new("RGBA", (w, h), (0, 0, 0, 0))
+    mask = np.empty((height, width), dtype=bool)
+
+    def fill(rows: slice, cols: slice, direction: Optional[str], solid: bool) -> None:
+        """Set a quadrant solid (center if ``solid``) or dithered toward ``direction``."""
+        if direction is None:
+            mask[rows, cols] = not solid
+        else:
+            mask[rows, cols] = create_bayer_mask(
+                cols.stop - cols.start, rows.stop - rows.start, direction, matrix_size
+            ).astype(bool)
+
+    top, bottom = slice(0, half_h), slice(half_h, height)
+    left, right = slice(0, half_w), slice(half_w, width)
 
-    # Each quadrant: use center tile if surrounded, bg if exposed
     # Top-left quadrant
     tl_center = has_n and has_w and has_nw
-    tl_src = center if tl_center else bg
     if has_n and has_w and not has_nw:
-        # Inner corner: mostly center with corner cut
-        tl_piece = center.crop((0, 0, half_w, half_h)).copy()
-        bg_corner = bg.crop((0, 0, half_w, half_h))
-        # Dither the corner
-        mask = create_bayer_mask(half_w, half_h, "corner_tl", matrix_size)
-        arr_c = np.array(tl_piece)
-        arr_b = np.array(bg_corner)
-        m = mask[:, :, np.newaxis].astype(bool)
-        piece = np.where(m, arr_b, arr_c)
-        result.paste(Image.fromarray(piece.astype(np.uint8)), (0, 0))
+        tl_dir = "corner_tl"
     elif (has_n or has_w) and not tl_center:
-        # Edge: dither blend (only when not fully connected)
-        direction = "top" if has_n and not has_w else "left" if has_w and not has_n else "corner_tl"
-        tl_c = center.crop((0, 0, half_w, half_h))
-        tl_b = bg.crop((0, 0, half_w, half_h))
-        mask = create_bayer_mask(half_w, half_h, direction, matrix_size)
-        arr_c = np.array(tl_c)
-        arr_b = np.array(tl_b)
-        # If edge present, center dominates that direction
-        if has_n and not has_w:
-            mask = 1.0 - mask  # Flip: center on top half
-            mask = create_bayer_mask(half_w, half_h, "right", matrix_size)
-        elif has_w and not has_n:
-            mask = create_bayer_mask(half_w, half_h, "bottom", matrix_size)
-        m = mask[:, :, np.newaxis].astype(bool)
-        piece = np.where(m, arr_b, arr_c)
-        result.paste(Image.fromarray(piece.astype(np.uint8)), (0, 0))
+        tl_dir = "right" if has_n and not has_w else "bottom" if has_w and not has_n else "corner_tl"
     else:
-        result.paste(tl_src.crop((0, 0, half_w, half_h)), (0, 0))
+        tl_dir = None
+    fill(top, left, tl_dir, tl_center)
 
     # Top-right quadrant
     tr_center = has_n and has_e and has_ne
     if has_n and has_e and not has_ne:
-        tr_piece = center.crop((half_w, 0, w, half_h)).copy()
-        bg_corner = bg.crop((half_w, 0, w, half_h))
-        mask = create_bayer_mask(w - half_w, half_h, "corner_tr", matrix_size)
-        arr_c = np.array(tr_piece)
-        arr_b = np.array(bg_corner)
-        m = mask[:, :, np.newaxis].astype(bool)
-        piece = np.where(m, arr_b, arr_c)
-        result.paste(Image.fromarray(piece.astype(np.uint8)), (half_w, 0))
+        tr_dir = "corner_tr"
     elif (has_n or has_e) and not tr_center:
-        tr_c = center.crop((half_w, 0, w, half_h))
-        tr_b = bg.crop((half_w, 0, w, half_h))
-        if has_n and not has_e:
-            mask = create_bayer_mask(w - half_w, half_h, "left", matrix_size)
-        elif has_e and not has_n:
-            mask = create_bayer_mask(w - half_w, half_h, "bottom", matrix_size)
-        else:
-            mask = create_bayer_mask(w - half_w, half_h, "corner_tr", matrix_size)
-        arr_c = np.array(tr_c)
-        arr_b = np.array(tr_b)
-        m = mask[:, :, np.newaxis].astype(bool)
-        piece = np.where(m, arr_b, arr_c)
-        result.paste(Image.fromarray(piece.astype(np.uint8)), (half_w, 0))
+        tr_dir = "left" if has_n and not has_e else "bottom" if has_e and not has_n else "corner_tr"
     else:
-        src = center if tr_center else bg
-        result.paste(src.crop((half_w, 0, w, half_h)), (half_w, 0))
+        tr_dir = None
+    fill(top, right, tr_dir, tr_center)
 
     # Bottom-left quadrant
     bl_center = has_s and has_w and has_sw
     if has_s and has_w and not has_sw:
-        bl_piece = center.crop((0, half_h, half_w, h)).copy()
-        bg_corner = bg.crop((0, half_h, half_w, h))
-        mask = create_bayer_mask(half_w, h - half_h, "corner_bl", matrix_size)
-        arr_c = np.array(bl_piece)
-        arr_b = np.array(bg_corner)
-        m = mask[:, :, np.newaxis].astype(bool)
-        piece = np.where(m, arr_b, arr_c)
-        result.paste(Image.fromarray(piece.astype(np.uint8)), (0, half_h))
+        bl_dir = "corner_bl"
     elif (has_s or has_w) and not bl_center:
-        bl_c = center.crop((0, half_h, half_w, h))
-        bl_b = bg.crop((0, half_h, half_w, h))
-        if has_s and not has_w:
-            mask = create_bayer_mask(half_w, h - half_h, "right", matrix_size)
-        elif has_w and not has_s:
-            mask = create_bayer_mask(half_w, h - half_h, "top", matrix_size)
-        else:
-            mask = create_bayer_mask(half_w, h - half_h, "corner_bl", matrix_size)
-        arr_c = np.array(bl_c)
-        arr_b = np.array(bl_b)
-        m = mask[:, :, np.newaxis].astype(bool)
-        piece = np.where(m, arr_b, arr_c)
-        result.paste(Image.fromarray(piece.astype(np.uint8)), (0, half_h))
+        bl_dir = "right" if has_s and not has_w else "top" if has_w and not has_s else "corner_bl"
     else:
-        src = center if bl_center else bg
-        result.paste(src.crop((0, half_h, half_w, h)), (0, half_h))
+        bl_dir = None
+    fill(bottom, left, bl_dir, bl_center)
 
     # Bottom-right quadrant
     br_center = has_s and has_e and has_se
     if has_s and has_e and not has_se:
-        br_piece = center.crop((half_w, half_h, w, h)).copy()
-        bg_corner = bg.crop((half_w, half_h, w, h))
-        mask = create_bayer_mask(w - half_w, h - half_h, "corner_br", matrix_size)
-        arr_c = np.array(br_piece)
-        arr_b = np.array(bg_corner)
-        m = mask[:, :, np.newaxis].astype(bool)
-        piece = np.where(m, arr_b, arr_c)
-        result.paste(Image.fromarray(piece.astype(np.uint8)), (half_w, half_h))
+        br_dir = "corner_br"
     elif (has_s or has_e) and not br_center:
-        br_c = center.crop((half_w, half_h, w, h))
-        br_b = bg.crop((half_w, half_h, w, h))
-        if has_s and not has_e:
-            mask = create_bayer_mask(w - half_w, h - half_h, "left", matrix_size)
-        elif has_e and not has_s:
-            mask = create_bayer_mask(w - half_w, h - half_h, "top", matrix_size)
-        else:
-            mask = create_bayer_mask(w - half_w, h - half_h, "corner_br", matrix_size)
-        arr_c = np.array(br_c)
-        arr_b = np.array(br_b)
-        m = mask[:, :, np.newaxis].astype(bool)
-        piece = np.where(m, arr_b, arr_c)
-        result.paste(Image.fromarray(piece.astype(np.uint8)), (half_w, half_h))
+        br_dir = "left" if has_s and not has_e else "top" if has_e and not has_s else "corner_br"
     else:
-        src = center if br_center else bg
-        result.paste(src.crop((half_w, half_h, w, h)), (half_w, half_h))
+        br_dir = None
+    fill(bottom, right, br_dir, br_center)
 
-    return result
+    mask.setflags(write=False)
+    return mask
+
+
+def generate_autotile47_tile(
+    center_tile: Image.Image,
+    bg_tile: Image.Image,
+    bitmask: int,
+    matrix_size: int = 4,
+    out: Optional[np.ndarray] = None,
+) -> Image.Image:
+    """
+    Generate a single autotile for the given bitmask configuration.
+
+    Uses quadrant-based compositing: each tile is divided into 4 quadrants,
+    and each quadrant is either center or background based on the bitmask
+    (see autotile47_mask). If ``out`` is given (a contiguous (H, W, 4) uint8
+    array), the tile is written into it instead of a freshly allocated buffer.
+    """
+    # Tiles are only read, never modified, so RGBA inputs are used as-is
+    center = center_tile if center_tile.mode == "RGBA" else center_tile.convert("RGBA")
+    bg = bg_tile if bg_tile.mode == "RGBA" else bg_tile.convert("RGBA")
+
+    if bg.size != center.size:
+        bg = bg.resize(center.size, Image.Resampling.NEAREST)
+
+    w, h = center.size
+    pix_c = _tile_pixels(center)
+    result = np.empty_like(pix_c) if out is None else out.view(np.uint32)[:, :, 0]
+    result[:] = pix_c
+    np.copyto(result, _tile_pixels(bg), where=autotile47_mask(bitmask, w, h, matrix_size))
+    return _pixels_to_image(result)
 
 
 def generate_autotile47_set(
@@ -840,33 +1034,42 @@ def generate_autotile47_set(
 
     w, h = center_tile.size
 
-    # Generate all 47 unique tiles and cache them for sheet assembly
-    sorted_items = sorted(BLOB47_CATEGORIES.items())
-    generated_tiles = {}
+    # Normalize the inputs once rather than in each of the 47 tile builds
+    center = center_tile if center_tile.mode == "RGBA" else center_tile.convert("RGBA")
+    bg = bg_tile if bg_tile.mode == "RGBA" else bg_tile.convert("RGBA")
+    if bg.size != center.size:
+        bg = bg.resize(center.size, Image.Resampling.NEAREST)
 
-    for bitmask, name in sorted_items:
-        if bitmask in generated_tiles:
-            continue
-        tile = generate_autotile47_tile(center_tile, bg_tile, bitmask, matrix_size)
+    n_tiles = len(BLOB47_KEYS_SORTED)
+    cols = 8
+    rows = math.ceil(n_tiles / cols)
+
+    # Composite all 47 tiles in one batched selection straight into their
+    # sheet slots: every tile picks between the same center and bg pixels,
+    # only the per-bitmask mask differs
+    slots = np.zeros((rows * cols, h, w, 4), dtype=np.uint8)
+    tiles = slots[:n_tiles].view(np.uint32)[..., 0]
+    masks = np.stack([autotile47_mask(bitmask, w, h, matrix_size) for bitmask in BLOB47_KEYS_SORTED])
+    tiles[:] = _tile_pixels(center)
+    np.copyto(tiles, _tile_pixels(bg), where=masks)
+
+    pending = []
+    for slot, bitmask in enumerate(BLOB47_KEYS_SORTED):
+        name = BLOB47_TABLE[bitmask]
         filename = f"{base_name}_{name}_{bitmask:03d}.png"
         path = os.path.join(output_dir, filename)
-        tile.save(path)
+        pending.append((Image.fromarray(slots[slot]), path))
         outputs[name] = path
-        generated_tiles[bitmask] = tile
-
-    # Generate combined tilemap (8 columns) using cached tiles
-    n_tiles = len(sorted_items)
-    cols = 8
-    rows = math.ceil(n_tiles / cols)
 
-    sheet = Image.new("RGBA", (cols * w, rows * h), (0, 0, 0, 0))
-    for i, (bitmask, _name) in enumerate(sorted_items):
-        col = i % cols
-        row = i // cols
-        sheet.paste(generated_tiles[bitmask], (col * w, row * h))
+    # Lay the slots out as a grid (8 columns) with a single reshape instead
+    # of pasting each tile
+    sheet = Image.fromarray(
+        slots.reshape(rows, cols, h, w, 4).transpose(0, 2, 1, 3, 4).reshape(rows * h, cols * w, 4)
+    )
 
     sheet_path = os.path.join(output_dir, f"{base_name}_autotile47_sheet.png")
-    sheet.save(sheet_path)
+    pending.append((sheet, sheet_path))
+    save_images(pending)
     outputs["_sheet"] = sheet_path
 
     # Save bitmask mapping JSON
@@ -875,7 +1078,7 @@ def generate_autotile47_set(
         "cols": cols,
         "rows": rows,
         "totalTiles": n_tiles,
-        "bitmaskMap": {str(k): {"name": v, "index": i} for i, (k, v) in enumerate(sorted(BLOB47_CATEGORIES.items()))},
+        "bitmaskMap": {str(k): {"name": BLOB47_TABLE[k], "index": slot} for slot, k in enumerate(BLOB47_KEYS_SORTED)},
     }
     mapping_path = os.path.join(output_dir, f"{base_name}_autotile47_map.json")
     with open(mapping_path, "w") as f:
@@ -893,6 +1096,11 @@ def generate_autotile47_set(
 # Palette Normalization & Cross-Pack Validation
 # =============================================================================
 
+# hueDistribution keys in hue order; vectors built from them line up bin for
+# bin whatever order a (possibly cached) palette's dict was written in
+HUE_BIN_KEYS = tuple(f"{i*30}-{(i+1)*30}deg" for i in range(12))
+
+
 def extract_tilemap_palette(
     tilemap_path: str,
     tile_size: int = 16,
@@ -907,34 +1115,47 @@ def extract_tilemap_palette(
     """
     img = Image.open(tilemap_path).convert("RGBA")
     w, h = img.size
-    arr = np.array(img)
+    arr = np.asarray(img)
 
-    # Get all opaque pixels
-    opaque_mask = arr[:, :, 3] >= 50
-    opaque_rgb = arr[opaque_mask][:, :3]
+    # Get all opaque pixels, gathering only their RGB channels
+    opaque_rgb = arr[:, :, :3][arr[:, :, 3] >= 50]
 
     if len(opaque_rgb) == 0:
         return {"path": tilemap_path, "colors": [], "stats": {}}
 
-    # Quantize to 5-bit
-    quantized = (opaque_rgb >> 3) << 3
-    unique, counts = np.unique(quantized, axis=0, return_counts=True)
+    # Quantize to 5-bit and pack into a 15-bit key; one bincount pass gives
+    # every color's count, its nonzero bins the unique colors in R, G, B order
+    levels = opaque_rgb >> 3
+    keys = (levels[:, 0].astype(np.intp) << 10) | (levels[:, 1].astype(np.intp) << 5) | levels[:, 2]
+    hist = np.bincount(keys, minlength=1 << 15)
+    unique = np.flatnonzero(hist)
+    counts = hist[unique]
 
     # Sort by frequency
     sorted_idx = np.argsort(-counts)
-    top_colors = unique[sorted_idx[:max_colors]]
+    top_keys = unique[sorted_idx[:max_colors]]
+    top_colors = (np.stack([top_keys >> 10, (top_keys >> 5) & 31, top_keys & 31], axis=-1) << 3).astype(np.uint8)
     top_counts = counts[sorted_idx[:max_colors]]
 
     # Compute statistics
     all_luminance = 0.299 * opaque_rgb[:, 0] + 0.587 * opaque_rgb[:, 1] + 0.114 * opaque_rgb[:, 2]
 
-    # Hue distribution (in 12 bins = 30 degrees each)
-    hue_bins = np.zeros(12)
-    for r, g, b in opaque_rgb[::10]:  # Sample every 10th pixel for speed
-        h_val, s, v = rgb_to_hsv(r / 255, g / 255, b / 255)
-        if s > 0.1 and v > 0.1:  # Skip achromatic
-            bin_idx = int(h_val * 12) % 12
-            hue_bins[bin_idx] += 1
+    # Hue distribution (in 12 bins = 30 degrees each), over every opaque pixel
+    # with colorsys.rgb_to_hsv's formulas applied array-wise
+    rgb = opaque_rgb / 255
+    maxc = rgb.max(axis=1)
+    rangec = maxc - rgb.min(axis=1)
+    chromatic = (maxc > 0.1) & (rangec > 0)
+    chromatic[chromatic] = rangec[chromatic] / maxc[chromatic] > 0.1  # Skip achromatic
+    rgb, maxc, rangec = rgb[chromatic], maxc[chromatic], rangec[chromatic]
+    rc, gc, bc = ((maxc[:, np.newaxis] - rgb) / rangec[:, np.newaxis]).T
+    h_val = np.select(
+        [rgb[:, 0] == maxc, rgb[:, 1] == maxc],
+        [bc - gc, 2.0 + rc - bc],
+        4.0 + gc - rc,
+    )
+    h_val = (h_val / 6.0) % 1.0
+    hue_bins = np.bincount((h_val * 12).astype(np.int64) % 12, minlength=12).astype(np.float64)
 
     total_hue = hue_bins.sum()
     if total_hue > 0:
@@ -944,20 +1165,64 @@ def extract_tilemap_palette(
         "path": tilemap_path,
         "colors": [{"rgb": c.tolist(), "count": int(n)} for c, n in zip(top_colors, top_counts)],
         "stats": {
-            "totalOpaquePixels": int(opaque_mask.sum()),
+            "totalOpaquePixels": len(opaque_rgb),
             "uniqueColors": int(len(unique)),
             "luminanceMean": float(all_luminance.mean()),
             "luminanceStd": float(all_luminance.std()),
             "luminanceMin": float(all_luminance.min()),
             "luminanceMax": float(all_luminance.max()),
-            "hueDistribution": {
-                f"{i*30}-{(i+1)*30}deg": float(hue_bins[i])
-                for i in range(12)
-            },
+            "hueDistribution": dict(zip(HUE_BIN_KEYS, hue_bins.tolist())),
         },
     }
 
 
+def load_tilemap_palette(
+    tilemap_path: str,
+    tile_size: int = 16,
+    max_colors: int = 64,
+) -> Dict[str, Any]:
+    """extract_tilemap_palette, reusing the result from a previous run.
+
+    Results are cached as JSON under tools/.cache/palettes, keyed by the
+    tilemap's resolved path, mtime and size plus the extraction arguments, so
+    an unchanged tilemap is only analyzed once across compare-palettes runs.
+    Within one process the result is memoized on the same key; callers must
+    not modify the returned dict in place.
+    """
+    path = Path(tilemap_path).resolve()
+    stat = path.stat()
+    return _load_tilemap_palette_keyed(tilemap_path, path, stat.st_mtime_ns, stat.st_size, tile_size, max_colors)
+
+
+@functools.lru_cache(maxsize=128)
+def _load_tilemap_palette_keyed(
+    tilemap_path: str, path: Path, mtime_ns: int, size: int, tile_size: int, max_colors: int
+) -> Dict[str, Any]:
+    key = f"{path}:{mtime_ns}:{size}:{tile_size}:{max_colors}"
+    stem = hashlib.sha1(f"{path}:{tile_size}:{max_colors}".encode()).hexdigest()[:16]
+    cache_path = PALETTE_CACHE_DIR / f"{stem}.json"
+
+    try:
+        with open(cache_path) as f:
+            cached = json.load(f)
+        if cached["key"] == key:
+            return {**cached["palette"], "path": tilemap_path}
+    except (OSError, ValueError, KeyError):
+        pass
+
+    palette = extract_tilemap_palette(tilemap_path, tile_size, max_colors=max_colors)
+    try:
+        PALETTE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        # Write-then-rename so concurrent runs never read a partial file
+        tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({"key": key, "palette": palette}, f)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass
+    return palette
+
+
 def compare_palettes(
     palette_a: Dict[str, Any],
     palette_b: Dict[str, Any],
@@ -997,10 +1262,12 @@ def compare_palettes(
     hue_a = stats_a.get("hueDistribution", {})
     hue_b = stats_b.get("hueDistribution", {})
     if hue_a and hue_b:
-        vec_a = np.array([hue_a.get(k, 0) for k in sorted(hue_a.keys())])
-        vec_b = np.array([hue_b.get(k, 0) for k in sorted(hue_b.keys())])
-        dot = np.dot(vec_a, vec_b)
-        norm = (np.linalg.norm(vec_a) * np.linalg.norm(vec_b))
+        vec_a = np.fromiter((hue_a.get(k, 0) for k in HUE_BIN_KEYS), dtype=np.float64, count=len(HUE_BIN_KEYS))
+        vec_b = np.fromiter((hue_b.get(k, 0) for k in HUE_BIN_KEYS), dtype=np.float64, count=len(HUE_BIN_KEYS))
+        # The norms are sqrt of each vector's self dot product, taken as
+        # Python floats to skip np.linalg.norm's general code path
+        dot = float(vec_a @ vec_b)
+        norm = math.sqrt(float(vec_a @ vec_a)) * math.sqrt(float(vec_b @ vec_b))
         cosine_sim = dot / norm if norm > 0 else 0
         if cosine_sim < 0.5:
             score -= 30
@@ -1032,6 +1299,23 @@ def compare_palettes(
     }
 
 
+def hue_similarity_matrix(palettes: List[Dict[str, Any]]) -> np.ndarray:
+    """
+    Return the (M, M) cosine similarity of M tilemap palettes' hue distributions.
+
+    For cross-pack scans: every pair is computed in one matrix product instead
+    of M^2 compare_palettes calls. Palettes without hue data score 0.
+    """
+    rows = []
+    for palette in palettes:
+        hue = palette.get("stats", {}).get("hueDistribution") or {}
+        rows.append([hue.get(k, 0) for k in HUE_BIN_KEYS])
+    vectors = np.array(rows, dtype=np.float64).reshape(len(palettes), len(HUE_BIN_KEYS))
+    norms = np.sqrt(np.einsum("ij,ij->i", vectors, vectors))
+    denom = np.outer(norms, norms)
+    return np.divide(vectors @ vectors.T, denom, out=np.zeros_like(denom), where=denom > 0)
+
+
 def normalize_palette(
     tile: Image.Image,
     reference_palette: List[Tuple[int, int, int]],
@@ -1046,25 +1330,34 @@ def normalize_palette(
     if tile.mode != "RGBA":
         tile = tile.convert("RGBA")
 
-    arr = np.array(tile).copy()
-    ref = np.array(reference_palette, dtype=np.float64)
-
-    h, w = arr.shape[:2]
-    rgb = arr[:, :, :3].astype(np.float64)
-
-    for y in range(h):
-        for x in range(w):
-            if arr[y, x, 3] < 50:
-                continue
-            pixel = rgb[y, x]
-            # Find nearest reference color (Euclidean distance)
-            dists = np.sqrt(((ref - pixel) ** 2).sum(axis=1))
-            nearest_idx = np.argmin(dists)
-            nearest_color = ref[nearest_idx]
-            # Blend toward reference
-            arr[y, x, :3] = (pixel * (1 - strength) + nearest_color * strength).astype(np.uint8)
-
-    return Image.fromarray(arr)
+    ref = np.array(reference_palette, dtype=np.float64).reshape(-1, 3)
+    red, green, blue = palette_sq_distance_tables(tuple(map(tuple, reference_palette)))
+
+    # Map each distinct color once, then scatter the results back to the pixels
+    arr = np.ascontiguousarray(tile)
+    colors, inverse = np.unique(arr.view(np.uint32).ravel(), return_inverse=True)
+    colors = colors.view(np.uint8).reshape(-1, 4).copy()
+    opaque = colors[colors[:, 3] >= 50]
+
+    bucket_nearest = palette_bucket_lut(tuple(map(tuple, reference_palette)))
+    for start in range(0, len(opaque), PALETTE_SWAP_CHUNK):
+        chunk = opaque[start:start + PALETTE_SWAP_CHUNK]
+        # Most colors' 5-bit bucket settles the nearest reference color; the
+        # rest take the nearest by squared Euclidean distance (the sqrt
+        # doesn't change the argmin), shape (colors, palette)
+        levels = chunk[:, :3] >> 3
+        nearest_idx = bucket_nearest[(levels[:, 0].astype(np.intp) << 10) | (levels[:, 1].astype(np.intp) << 5) | levels[:, 2]]
+        unsettled = np.flatnonzero(nearest_idx < 0)
+        if unsettled.size:
+            rest = chunk[unsettled]
+            dists = red[rest[:, 0]] + green[rest[:, 1]] + blue[rest[:, 2]]
+            nearest_idx[unsettled] = dists.argmin(axis=1)
+        nearest = ref[nearest_idx]
+        # Blend toward reference
+        chunk[:, :3] = (chunk[:, :3] * (1 - strength) + nearest * strength).astype(np.uint8)
+    colors[colors[:, 3] >= 50] = opaque
+
+    return Image.fromarray(colors[inverse.ravel()].reshape(arr.shape))
 
 
 # =============================================================================
@@ -1078,8 +1371,8 @@ def blend_tiles(
     direction: Optional[str] = None,
 ) -> Image.Image:
     """Blend two tiles (smooth gradient). Use dither_blend_tiles for pixel art."""
-    a = tile_a.convert("RGBA")
-    b = tile_b.convert("RGBA")
+    a = tile_a if tile_a.mode == "RGBA" else tile_a.convert("RGBA")
+    b = tile_b if tile_b.mode == "RGBA" else tile_b.convert("RGBA")
     if a.size != b.size:
         b = b.resize(a.size, Image.Resampling.NEAREST)
 
@@ -1100,13 +1393,91 @@ def blend_tiles(
     elif direction == "bottom":
         mask = np.linspace(1, 0, h)[:, np.newaxis].repeat(w, axis=1)
     elif direction == "diagonal":
-        for y in range(h):
-            for x in range(w):
-                mask[y, x] = (x + y) / max(w + h - 2, 1)
+        ys, xs = np.ogrid[:h, :w]
+        mask = (xs + ys) / max(w + h - 2, 1)
 
+    # a * (1 - mask) + b * mask, accumulated in the input buffers rather
+    # than three fresh float64 temporaries
     mask_4d = mask[:, :, np.newaxis]
-    result = arr_a * (1 - mask_4d) + arr_b * mask_4d
-    return Image.fromarray(result.astype(np.uint8))
+    np.multiply(arr_a, 1 - mask_4d, out=arr_a)
+    np.multiply(arr_b, mask_4d, out=arr_b)
+    np.add(arr_a, arr_b, out=arr_a)
+    return Image.fromarray(arr_a.astype(np.uint8))
+
+
+def _hsv_shift_kernel(arr, hue_shift, saturation_factor, brightness_factor, out):
+    h, w = arr.shape[:2]
+    for y in numba.prange(h):
+        for x in range(w):
+            if arr[y, x, 3] < 10:
+                for c in range(4):
+                    out[y, x, c] = arr[y, x, c]
+                continue
+            r, g, b = arr[y, x, 0] / 255.0, arr[y, x, 1] / 255.0, arr[y, x, 2] / 255.0
+
+            # rgb_to_hsv
+            maxc = max(max(r, g), b)
+            minc = min(min(r, g), b)
+            diff = maxc - minc
+            s = diff / maxc if maxc != 0 else 0.0
+            hue = 0.0
+            if diff > 0:
+                if maxc == r:
+                    hue = ((g - b) / diff) % 6
+                elif maxc == g:
+                    hue = (b - r) / diff + 2
+                else:
+                    hue = (r - g) / diff + 4
+            hue = hue / 6.0
+
+            # Apply shifts
+            hue = (hue + hue_shift / 360.0) % 1.0
+            s = min(max(s + saturation_factor, 0.0), 1.0)
+            v = min(max(maxc + brightness_factor, 0.0), 1.0)
+
+            # hsv_to_rgb, picking the sextant's channels directly
+            hi = int(hue * 6) % 6
+            f = hue * 6 - hi
+            p = v * (1 - s)
+            q = v * (1 - f * s)
+            t = v * (1 - (1 - f) * s)
+            if hi == 0:
+                r, g, b = v, t, p
+            elif hi == 1:
+                r, g, b = q, v, p
+            elif hi == 2:
+                r, g, b = p, v, t
+            elif hi == 3:
+                r, g, b = p, q, v
+            elif hi == 4:
+                r, g, b = t, p, v
+            else:
+                r, g, b = v, p, q
+            out[y, x, 0] = np.uint8(r * 255)
+            out[y, x, 1] = np.uint8(g * 255)
+            out[y, x, 2] = np.uint8(b * 255)
+            out[y, x, 3] = arr[y, x, 3]
+
+
+@functools.lru_cache(maxsize=None)
+def load_hsv_kernel():
+    """Return the numba-compiled HSV shift kernel, or None if numba isn't installed.
+
+    The kernel converts, shifts and converts back one pixel at a time in a
+    single pass, instead of building a dozen full-size float temporaries.
+    """
+    return njit_or_none(_hsv_shift_kernel)
+
+
+# For each hsv_to_rgb sextant, which of (v, t, p, q) becomes R, G and B
+HSV_SEXTANT_CHANNELS = np.array([
+    [0, 1, 2],  # (v, t, p)
+    [3, 0, 2],  # (q, v, p)
+    [2, 0, 1],  # (p, v, t)
+    [2, 3, 0],  # (p, q, v)
+    [1, 2, 0],  # (t, p, v)
+    [0, 2, 3],  # (v, p, q)
+], dtype=np.intp)
 
 
 def color_shift_tile(
@@ -1115,9 +1486,22 @@ def color_shift_tile(
     saturation_factor: float = 0.0,
     brightness_factor: float = 0.0,
 ) -> Image.Image:
-    """Create a color variant by shifting HSV values (vectorized)."""
+    """Create a color variant by shifting HSV values (vectorized).
+
+    With no shift at all the tile is returned as an RGBA copy; the HSV round
+    trip would otherwise truncate some channels down by one.
+    """
     if tile.mode != "RGBA":
         tile = tile.convert("RGBA")
+    if hue_shift == 0 and saturation_factor == 0 and brightness_factor == 0:
+        return tile.copy()
+
+    w, h = tile.size
+    kernel = load_hsv_kernel() if w * h >= HSV_JIT_MIN_PIXELS else None
+    if kernel is not None:
+        out = np.empty((h, w, 4), dtype=np.uint8)
+        kernel(np.asarray(tile), float(hue_shift), float(saturation_factor), float(brightness_factor), out)
+        return Image.fromarray(out)
 
     arr = np.array(tile, dtype=np.float64)
     result = arr.copy()
@@ -1159,15 +1543,10 @@ def color_shift_tile(
     q = v * (1 - f * s)
     t = v * (1 - (1 - f) * s)
 
-    r_out = np.zeros_like(v)
-    g_out = np.zeros_like(v)
-    b_out = np.zeros_like(v)
-
-    for i, (rv, gv, bv) in enumerate([(v, t, p), (q, v, p), (p, v, t), (p, q, v), (t, p, v), (v, p, q)]):
-        mask = hi == i
-        r_out[mask] = rv[mask]
-        g_out[mask] = gv[mask]
-        b_out[mask] = bv[mask]
+    # One gather picks each pixel's R, G, B from (v, t, p, q) by sextant
+    candidates = np.stack([v, t, p, q])
+    picks = HSV_SEXTANT_CHANNELS[hi].transpose(2, 0, 1)
+    r_out, g_out, b_out = np.take_along_axis(candidates, picks, axis=0)
 
     result[:, :, 0] = np.where(opaque_mask, r_out * 255, arr[:, :, 0])
     result[:, :, 1] = np.where(opaque_mask, g_out * 255, arr[:, :, 1])
@@ -1184,11 +1563,11 @@ def create_edge_tile(
     use_dither: bool = True,
 ) -> Image.Image:
     """Create an edge tile by fading one side into background (with Bayer dithering option)."""
-    center = center_tile.convert("RGBA")
+    center = center_tile if center_tile.mode == "RGBA" else center_tile.convert("RGBA")
     w, h = center.size
 
     if bg_tile:
-        bg = bg_tile.convert("RGBA")
+        bg = bg_tile if bg_tile.mode == "RGBA" else bg_tile.convert("RGBA")
         if bg.size != center.size:
             bg = bg.resize(center.size, Image.Resampling.NEAREST)
     else:
@@ -1197,30 +1576,41 @@ def create_edge_tile(
     if use_dither:
         return dither_blend_tiles(center, bg, direction, matrix_size=4)
 
-    # Smooth fallback
-    arr_center = np.array(center, dtype=np.float64)
-    arr_bg = np.array(bg, dtype=np.float64)
+    # Smooth fallback. Outside the fade band the mask is 1, which leaves the
+    # center pixels as they are with the higher of the two alphas, so only
+    # the band is blended in floating point
+    arr_center = np.asarray(center)
+    arr_bg = np.asarray(bg)
+    result = arr_center.copy()
+    np.maximum(result[:, :, 3], arr_bg[:, :, 3], out=result[:, :, 3])
     fade_pixels = max(1, int(min(w, h) * fade_ratio))
 
-    alpha_mask = np.ones((h, w), dtype=np.float64)
+    # Linear fade from 0 at the edge up to 1 over fade_pixels rows/columns
+    ramp = np.arange(fade_pixels) / fade_pixels
     if direction == "top":
-        for y in range(fade_pixels):
-            alpha_mask[y, :] = y / fade_pixels
+        band, alpha_mask = np.s_[:fade_pixels, :], ramp[:h, np.newaxis]
     elif direction == "bottom":
-        for y in range(fade_pixels):
-            alpha_mask[h - 1 - y, :] = y / fade_pixels
+        band, alpha_mask = np.s_[max(h - fade_pixels, 0):, :], ramp[:h][::-1, np.newaxis]
     elif direction == "left":
-        for x in range(fade_pixels):
-            alpha_mask[:, x] = x / fade_pixels
+        band, alpha_mask = np.s_[:, :fade_pixels], ramp[:w]
     elif direction == "right":
-        for x in range(fade_pixels):
-            alpha_mask[:, w - 1 - x] = x / fade_pixels
+        band, alpha_mask = np.s_[:, max(w - fade_pixels, 0):], ramp[:w][::-1]
+    else:
+        return Image.fromarray(result)
+
+    band_center = arr_center[band].astype(np.float64)
+    band_bg = arr_bg[band].astype(np.float64)
+    alpha = np.maximum(band_bg[:, :, 3], band_center[:, :, 3] * alpha_mask)
 
-    mask_4d = alpha_mask[:, :, np.newaxis]
-    blended = arr_bg * (1 - mask_4d) + arr_center * mask_4d
-    blended[:, :, 3] = np.maximum(arr_bg[:, :, 3], arr_center[:, :, 3] * alpha_mask)
+    # bg * (1 - mask) + center * mask, accumulated in the band buffers
+    mask_4d = alpha_mask[..., np.newaxis]
+    np.multiply(band_bg, 1 - mask_4d, out=band_bg)
+    np.multiply(band_center, mask_4d, out=band_center)
+    blended = np.add(band_bg, band_center, out=band_bg)
+    blended[:, :, 3] = alpha
+    result[band] = blended.astype(np.uint8)
 
-    return Image.fromarray(blended.astype(np.uint8))
+    return Image.fromarray(result)
 
 
 def generate_seasonal_variants(
@@ -1231,11 +1621,9 @@ def generate_seasonal_variants(
     """Generate seasonal color variants using palette swap."""
     os.makedirs(output_dir, exist_ok=True)
     variants = generate_palette_variants(tile)
-    paths = []
-    for name, img in variants.items():
-        path = os.path.join(output_dir, f"{base_name}_{name}.png")
-        img.save(path)
-        paths.append(path)
+    paths = [os.path.join(output_dir, f"{base_name}_{name}.png") for name in variants]
+    save_images(list(zip(variants.values(), paths)))
+    for name, path in zip(variants, paths):
         print(f"  Generated {name}: {path}")
     return paths
 
@@ -1248,29 +1636,27 @@ def generate_autotile_set(
 ) -> List[str]:
     """Generate simple 9-tile auto-tile set (legacy, use autotile47 for production)."""
     os.makedirs(output_dir, exist_ok=True)
-    outputs = []
+    pending = [(center_tile, os.path.join(output_dir, f"{base_name}_center.png"))]
 
-    center_path = os.path.join(output_dir, f"{base_name}_center.png")
-    center_tile.save(center_path)
-    outputs.append(center_path)
+    # Normalize the inputs once rather than in each edge build
+    center_tile = center_tile if center_tile.mode == "RGBA" else center_tile.convert("RGBA")
+    if bg_tile and bg_tile.mode != "RGBA":
+        bg_tile = bg_tile.convert("RGBA")
 
+    # Each edge is built once; the corners blend the two edges they join
+    edges = {}
     for direction in ["top", "bottom", "left", "right"]:
-        edge = create_edge_tile(center_tile, bg_tile, direction)
-        path = os.path.join(output_dir, f"{base_name}_edge_{direction}.png")
-        edge.save(path)
-        outputs.append(path)
+        edges[direction] = create_edge_tile(center_tile, bg_tile, direction)
+        pending.append((edges[direction], os.path.join(output_dir, f"{base_name}_edge_{direction}.png")))
 
     corner_dirs = {"tl": ("top", "left"), "tr": ("top", "right"),
                    "bl": ("bottom", "left"), "br": ("bottom", "right")}
     for corner_name, (d1, d2) in corner_dirs.items():
-        edge1 = create_edge_tile(center_tile, bg_tile, d1)
-        edge2 = create_edge_tile(center_tile, bg_tile, d2)
-        corner = Image.blend(edge1, edge2, 0.5)
-        path = os.path.join(output_dir, f"{base_name}_corner_{corner_name}.png")
-        corner.save(path)
-        outputs.append(path)
+        corner = Image.blend(edges[d1], edges[d2], 0.5)
+        pending.append((corner, os.path.join(output_dir, f"{base_name}_corner_{corner_name}.png")))
 
-    return outputs
+    save_images(pending)
+    return [path for _, path in pending]
 
 
 def fill_tileset_gaps(
@@ -1282,70 +1668,80 @@ def fill_tileset_gaps(
 ) -> dict:
     """Fill empty slots in a tileset by mirroring, rotating, or noise generation."""
     img = Image.open(tileset_path).convert("RGBA")
-    w, h = img.size
+    arr = np.asarray(img)
+    h, w = arr.shape[:2]
     rows = h // tile_size
 
-    result = img.copy()
-    filled = 0
-
-    for row in range(rows):
-        for col in range(cols):
-            x = col * tile_size
-            y = row * tile_size
-            tile = img.crop((x, y, x + tile_size, y + tile_size))
+    # The slot grid as one array: a view of the image when it is wide enough,
+    # else a zero-padded copy so slots past the edge read as transparent, as
+    # cropping them would
+    grid_w = cols * tile_size
+    if w >= grid_w:
+        grid = arr[:rows * tile_size, :grid_w]
+    else:
+        grid = np.zeros((rows * tile_size, grid_w, 4), dtype=np.uint8)
+        grid[:, :w] = arr[:rows * tile_size]
 
-            pixels = list(tile.getdata())
-            transparent = sum(1 for p in pixels if p[3] < 10)
-            if (transparent / max(len(pixels), 1)) < 0.95:
-                continue
+    # A slot is empty when at least 95% of its pixels are transparent
+    transparent = (grid[:, :, 3] < 10).reshape(rows, tile_size, cols, tile_size).sum(axis=(1, 3))
+    empty = transparent / max(tile_size * tile_size, 1) >= 0.95
 
-            source_tile = _find_neighbor_tile(img, col, row, tile_size, cols, rows)
-            if source_tile is None:
-                continue
+    result = arr.copy()
+    filled = 0
+    rng = np.random.default_rng()
 
-            if fill_method == "mirror":
-                generated = source_tile.transpose(Image.Transpose.FLIP_LEFT_RIGHT)
-            elif fill_method == "rotate":
-                generated = source_tile.rotate(90, expand=False)
-            elif fill_method == "noise":
-                generated = _generate_noise_tile(source_tile, tile_size)
-            else:
-                generated = source_tile.copy()
+    for row, col in np.argwhere(empty).tolist():
+        neighbor = _find_neighbor_tile(empty, col, row)
+        if neighbor is None:
+            continue
+        nc, nr = neighbor
+        source_tile = grid[nr * tile_size:(nr + 1) * tile_size, nc * tile_size:(nc + 1) * tile_size]
+
+        if fill_method == "mirror":
+            generated = source_tile[:, ::-1]
+        elif fill_method == "rotate":
+            generated = np.rot90(source_tile)
+        elif fill_method == "noise":
+            generated = _generate_noise_tile(source_tile, tile_size, rng)
+        else:
+            generated = source_tile
 
-            result.paste(generated, (x, y))
-            filled += 1
+        x = col * tile_size
+        y = row * tile_size
+        slot = result[y:y + tile_size, x:x + tile_size]
+        slot[:] = generated[:slot.shape[0], :slot.shape[1]]
+        filled += 1
 
-    result.save(output_path)
+    Image.fromarray(result).save(output_path)
     print(f"Filled {filled} empty slots in tileset")
     return {"filled": filled, "output": output_path}
 
 
-def _find_neighbor_tile(img, col, row, tile_size, max_cols, max_rows):
-    """Find the nearest non-empty neighbor tile."""
+def _find_neighbor_tile(empty: np.ndarray, col: int, row: int) -> Optional[Tuple[int, int]]:
+    """Find the nearest non-empty neighbor slot in the (rows, cols) empty-slot grid."""
+    max_rows, max_cols = empty.shape
     for dc, dr in [(0, -1), (-1, 0), (1, 0), (0, 1), (-1, -1), (1, -1), (-1, 1), (1, 1)]:
         nc, nr = col + dc, row + dr
-        if 0 <= nc < max_cols and 0 <= nr < max_rows:
-            x, y = nc * tile_size, nr * tile_size
-            tile = img.crop((x, y, x + tile_size, y + tile_size))
-            pixels = list(tile.getdata())
-            transparent = sum(1 for p in pixels if p[3] < 10)
-            if (transparent / max(len(pixels), 1)) < 0.95:
-                return tile
+        if 0 <= nc < max_cols and 0 <= nr < max_rows and not empty[nr, nc]:
+            return nc, nr
     return None
 
 
-def _generate_noise_tile(source, size):
-    """Generate a noise tile matching the color palette of the source."""
-    arr = np.array(source.convert("RGBA"))
-    opaque = arr[arr[:, :, 3] > 50]
-    if len(opaque) == 0:
-        return Image.new("RGBA", (size, size), (0, 0, 0, 0))
-
-    avg_color = opaque[:, :3].mean(axis=0).astype(np.uint8)
-    noise = np.random.randint(-15, 16, (size, size, 3), dtype=np.int16)
-    result = np.clip(avg_color + noise, 0, 255).astype(np.uint8)
-    alpha = np.full((size, size, 1), 255, dtype=np.uint8)
-    return Image.fromarray(np.concatenate([result, alpha], axis=2))
+def _generate_noise_tile(source: np.ndarray, size: int, rng: np.random.Generator) -> np.ndarray:
+    """Generate a noise tile matching the color palette of an RGBA source tile."""
+    opaque = source[:, :, 3] > 50
+    count = np.count_nonzero(opaque)
+    if count == 0:
+        return np.zeros((size, size, 4), dtype=np.uint8)
+
+    # Mean of the opaque pixels, floored, without gathering them first
+    totals = np.einsum("ijc,ij->c", source[:, :, :3], opaque, dtype=np.int64)
+    avg_color = (totals // count).astype(np.int16)
+    noise = rng.integers(-15, 16, (size, size, 3), dtype=np.int16)
+    result = np.empty((size, size, 4), dtype=np.uint8)
+    result[:, :, :3] = np.clip(avg_color + noise, 0, 255)
+    result[:, :, 3] = 255
+    return result
 
 
 # =============================================================================
@@ -1570,16 +1966,16 @@ def main() -> None:
         b = Image.open(args.tile_b).convert("RGBA")
         os.makedirs(args.output_dir, exist_ok=True)
         directions = ["top", "bottom", "left", "right", "diagonal"]
+        transitions = {}
         for direction in directions:
-            result = blend_tiles(a, b, direction=direction)
+            result = transitions[direction] = blend_tiles(a, b, direction=direction)
             path = os.path.join(args.output_dir, f"{args.name}_transition_{direction}.png")
             result.save(path)
             print(f"  Transition {direction}: {path}")
         for corner, (dx, dy) in [("tl", ("left", "top")), ("tr", ("right", "top")),
                                    ("bl", ("left", "bottom")), ("br", ("right", "bottom"))]:
-            half1 = blend_tiles(a, b, direction=dx)
-            half2 = blend_tiles(a, b, direction=dy)
-            corner_tile = Image.blend(half1, half2, 0.5)
+            # The corners reuse the axis transitions built above
+            corner_tile = Image.blend(transitions[dx], transitions[dy], 0.5)
             path = os.path.join(args.output_dir, f"{args.name}_corner_{corner}.png")
             corner_tile.save(path)
             print(f"  Corner {corner}: {path}")
@@ -1613,8 +2009,8 @@ def main() -> None:
         print(f"Normalized palette (strength={args.strength}): {args.output}")
 
     elif args.command == "compare-palettes":
-        pal_a = extract_tilemap_palette(args.tilemap_a, args.tile_size)
-        pal_b = extract_tilemap_palette(args.tilemap_b, args.tile_size)
+        pal_a = load_tilemap_palette(args.tilemap_a, args.tile_size)
+        pal_b = load_tilemap_palette(args.tilemap_b, args.tile_size)
         comparison = compare_palettes(pal_a, pal_b)
         print(f"\nPalette Compatibility Score: {comparison['score']}/100")
         print(f"Compatible: {'Yes' if comparison['compatible'] else 'No'}")
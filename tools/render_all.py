@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""Render the village reference map previews in one command.
+
+render_map_with_tiles and visualize_roads draw independent PNGs, so each
+runs in its own worker process; their logs are printed in order once both
+have finished. Outputs go to assets/extracted/visualization as with the
+individual scripts.
+"""
+
+import io
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+
+import render_map_with_tiles
+import visualize_roads
+
+RENDERERS = {
+    "village_map": render_map_with_tiles.main,
+    "road_map": visualize_roads.main,
+}
+
+
+def run_captured(name: str) -> str:
+    """Run one renderer in a worker process, returning its log text."""
+    buffer = io.StringIO()
+    with redirect_stdout(buffer):
+        RENDERERS[name]()
+    return buffer.getvalue()
+
+
+def main() -> None:
+    """Run both renderers concurrently and print their logs in order."""
+    with ProcessPoolExecutor(max_workers=len(RENDERERS)) as pool:
+        futures = [pool.submit(run_captured, name) for name in RENDERERS]
+        for future in futures:
+            print(future.result(), end="")
+
+
+if __name__ == "__main__":
+    main()
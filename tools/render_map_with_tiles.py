@@ -4,10 +4,28 @@ Render the village map based on reference image.
 Accurate road layout matching the provided reference.
 """
 
-from PIL import Image, ImageDraw, ImageFont
+import functools
+
+import numpy as np
+from PIL import Image, ImageDraw
 import json
 import os
 
+from extract_utils import load_font
+from generate_road_map import (
+    GRASS,
+    ROAD,
+    WATER,
+    GRASS_PLAZA,
+    tile_templates,
+    tile_cells,
+    gather_tiles,
+    render_label,
+    render_panel,
+    draw_outline,
+    draw_grid,
+)
+
 MAP_WIDTH = 64
 MAP_HEIGHT = 52
 TILE_SIZE = 16
@@ -17,6 +35,12 @@ TILE_ROAD = 2
 TILE_WATER = 3
 TILE_PLAZA_GRASS = 4
 
+# generate_road_map's ground tile for each tile id; ids without one are grass.
+# Its 16px templates are the visible corner of the 32px tiles this map was
+# drawn with: each tile overlapped the cells right and below it, and only
+# its top-left cell survived the tiles pasted after it
+TILE_TEMPLATE_INDEX = np.array([GRASS, GRASS, ROAD, WATER, GRASS_PLAZA])
+
 ZONE_BOUNDS = {
     "lobby": {"x": 12, "y": 3, "width": 24, "height": 9},
     "office": {"x": 37, "y": 3, "width": 22, "height": 14},
@@ -28,65 +52,82 @@ ZONE_BOUNDS = {
 
 
 def create_tile_map():
-    tile_map = [[TILE_GRASS for _ in range(MAP_WIDTH)] for _ in range(MAP_HEIGHT)]
+    tile_map = np.full((MAP_HEIGHT, MAP_WIDTH), TILE_GRASS, dtype=np.uint8)
 
-    for y in range(3):
-        for x in range(MAP_WIDTH):
-            tile_map[y][x] = TILE_WATER
-    for y in range(3, 20):
-        for x in range(5):
-            tile_map[y][x] = TILE_WATER
+    tile_map[:3, :] = TILE_WATER
+    tile_map[3:20, :5] = TILE_WATER
 
     for i in range(12):
-        y = 3 + i
-        x_start = 5 + i
-        x_end = 8 + i
-        for x in range(x_start, min(x_end, MAP_WIDTH)):
-            if y < MAP_HEIGHT:
-                tile_map[y][x] = TILE_ROAD
+        tile_map[3 + i, 5 + i:8 + i] = TILE_ROAD
 
-    for y in range(12, 16):
-        for x in range(17, 40):
-            tile_map[y][x] = TILE_ROAD
+    for (y0, y1), (x0, x1) in (
+        ((12, 16), (17, 40)),
+        ((16, 36), (17, 21)),
+        ((16, 18), (21, 40)),
+        ((18, 33), (37, 40)),
+        ((33, 36), (21, 40)),
+        ((36, 50), (17, 60)),
+    ):
+        tile_map[y0:y1, x0:x1] = TILE_ROAD
 
-    for y in range(16, 36):
-        for x in range(17, 21):
-            tile_map[y][x] = TILE_ROAD
+    tile_map[18:33, 21:37] = TILE_PLAZA_GRASS
 
-    for y in range(16, 18):
-        for x in range(21, 40):
-            tile_map[y][x] = TILE_ROAD
+    return tile_map
 
-    for y in range(18, 33):
-        for x in range(37, 40):
-            tile_map[y][x] = TILE_ROAD
 
-    for y in range(33, 36):
-        for x in range(21, 40):
-            tile_map[y][x] = TILE_ROAD
+@functools.lru_cache(maxsize=1)
+def tile_id_templates():
+    """Return the ground template of each tile id, indexed by id, built once."""
+    templates = tile_templates()[TILE_TEMPLATE_INDEX]
+    templates.flags.writeable = False
+    return templates
 
-    for y in range(36, 50):
-        for x in range(17, 60):
-            tile_map[y][x] = TILE_ROAD
 
-    for y in range(18, 33):
-        for x in range(21, 37):
-            tile_map[y][x] = TILE_PLAZA_GRASS
+@functools.lru_cache(maxsize=1)
+def zone_cell_masks():
+    """Return a per-tile boolean mask of each zone's bounds, built once."""
+    masks = {}
+    for zone_name, bounds in ZONE_BOUNDS.items():
+        cells = np.zeros((MAP_HEIGHT, MAP_WIDTH), dtype=bool)
+        cells[
+            max(bounds["y"], 0):bounds["y"] + bounds["height"],
+            max(bounds["x"], 0):bounds["x"] + bounds["width"],
+        ] = True
+        cells.flags.writeable = False
+        masks[zone_name] = cells
+    return masks
 
-    return tile_map
 
+def draw_legend(draw, legend_x, legend_y, items):
+    font = load_font(20)
+    small_font = load_font(14)
 
-def render_map():
-    grass_tile = Image.new("RGBA", (32, 32), (76, 153, 0, 255))
-    road_tile = Image.new("RGBA", (32, 32), (210, 210, 210, 255))
-    water_tile = Image.new("RGBA", (32, 32), (64, 164, 223, 255))
-    plaza_grass = Image.new("RGBA", (32, 32), (102, 178, 51, 255))
+    draw.rectangle(
+        [legend_x, legend_y, legend_x + 230, legend_y + 220], fill=(0, 0, 0, 220)
+    )
+    draw.text(
+        (legend_x + 10, legend_y + 10), "VILLAGE MAP", fill=(255, 255, 255), font=font
+    )
+    draw.text(
+        (legend_x + 10, legend_y + 35),
+        "64x52 tiles (2048x1664 px)",
+        fill=(180, 180, 180),
+        font=small_font,
+    )
+
+    for i, (name, color) in enumerate(items):
+        iy = legend_y + 55 + i * 16
+        draw.rectangle([legend_x + 10, iy, legend_x + 25, iy + 12], fill=color)
+        draw.text((legend_x + 35, iy - 2), name, fill=(255, 255, 255), font=small_font)
+
+
+@functools.lru_cache(maxsize=1)
+def legend_image(items):
+    """Rasterize the legend for the given (name, color) items once, or None."""
+    return render_panel(231, 221, draw_legend, items)
 
-    draw_road = ImageDraw.Draw(road_tile)
-    for i in range(0, 32, 8):
-        draw_road.line([(i, 0), (i, 32)], fill=(180, 180, 180), width=1)
-        draw_road.line([(0, i), (32, i)], fill=(180, 180, 180), width=1)
 
+def render_map():
     zone_colors = {
         "lobby": (200, 230, 201, 255),
         "office": (187, 222, 251, 255),
@@ -99,53 +140,31 @@ def render_map():
     tile_map = create_tile_map()
 
     img_width = MAP_WIDTH * TILE_SIZE
-    img_height = MAP_HEIGHT * TILE_SIZE
-    img = Image.new("RGBA", (img_width, img_height), (0, 0, 0, 255))
-
-    for y in range(MAP_HEIGHT):
-        for x in range(MAP_WIDTH):
-            px = x * TILE_SIZE
-            py = y * TILE_SIZE
-            tile_id = tile_map[y][x]
-
-            if tile_id == TILE_WATER:
-                img.paste(water_tile, (px, py))
-            elif tile_id == TILE_ROAD:
-                img.paste(road_tile, (px, py))
-            elif tile_id == TILE_PLAZA_GRASS:
-                img.paste(plaza_grass, (px, py))
-            else:
-                img.paste(grass_tile, (px, py))
-
-    for zone_name, bounds in ZONE_BOUNDS.items():
-        color = zone_colors[zone_name]
-        for y in range(bounds["y"], bounds["y"] + bounds["height"]):
-            for x in range(bounds["x"], bounds["x"] + bounds["width"]):
-                if 0 <= y < MAP_HEIGHT and 0 <= x < MAP_WIDTH:
-                    if tile_map[y][x] == TILE_GRASS:
-                        px = x * TILE_SIZE
-                        py = y * TILE_SIZE
-                        zone_tile = Image.new("RGBA", (32, 32), color)
-                        img.paste(zone_tile, (px, py))
-
-    draw = ImageDraw.Draw(img)
 
+    # Broadcast the cached ground templates into every cell
+    pixels = gather_tiles(tile_id_templates(), tile_map)
+    tiles = tile_cells(pixels)
+
+    grass = tile_map == TILE_GRASS
+    for zone_name, zone_cells in zone_cell_masks().items():
+        cells = zone_cells & grass
+        # Zone tiles are 32px too, so each one also covers the cells to its
+        # right and below, whatever their type
+        cells[:, 1:] |= cells[:, :-1].copy()
+        cells[1:, :] |= cells[:-1, :].copy()
+        tiles[cells] = zone_colors[zone_name]
+
+    # Outlines, labels and the grid go straight into the pixel array too;
+    # only the legend goes through ImageDraw
     boundary_color = (121, 85, 61, 255)
     for zone_name, bounds in ZONE_BOUNDS.items():
         zx = bounds["x"] * TILE_SIZE
         zy = bounds["y"] * TILE_SIZE
         zw = bounds["width"] * TILE_SIZE
         zh = bounds["height"] * TILE_SIZE
-        draw.rectangle(
-            [zx, zy, zx + zw - 1, zy + zh - 1], outline=boundary_color, width=4
-        )
+        draw_outline(pixels, zx, zy, zx + zw - 1, zy + zh - 1, 4, boundary_color)
 
-    try:
-        font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 20)
-        small_font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 14)
-    except:
-        font = ImageFont.load_default()
-        small_font = font
+    font = load_font(20)
 
     for zone_name, bounds in ZONE_BOUNDS.items():
         zx = bounds["x"] * TILE_SIZE
@@ -153,48 +172,27 @@ def render_map():
         zw = bounds["width"] * TILE_SIZE
         zh = bounds["height"] * TILE_SIZE
 
-        label = zone_name.upper().replace("-", "\n")
-        bbox = draw.textbbox((0, 0), label, font=font)
-        text_width = bbox[2] - bbox[0]
-        text_height = bbox[3] - bbox[1]
+        text = zone_name.upper().replace("-", "\n")
+        label, text_width, text_height = render_label(text, font, 6, (0, 0, 0, 200), (255, 255, 255))
         text_x = zx + (zw - text_width) // 2
         text_y = zy + (zh - text_height) // 2
 
-        draw.rectangle(
-            [text_x - 6, text_y - 6, text_x + text_width + 6, text_y + text_height + 6],
-            fill=(0, 0, 0, 200),
-        )
-        draw.text((text_x, text_y), label, fill=(255, 255, 255), font=font)
-
-    for y in range(MAP_HEIGHT + 1):
-        draw.line(
-            [(0, y * TILE_SIZE), (img_width, y * TILE_SIZE)],
-            fill=(80, 80, 80, 60),
-            width=1,
-        )
-    for x in range(MAP_WIDTH + 1):
-        draw.line(
-            [(x * TILE_SIZE, 0), (x * TILE_SIZE, img_height)],
-            fill=(80, 80, 80, 60),
-            width=1,
-        )
-
-    legend_y = 10
-    legend_x = img_width - 240
-    draw.rectangle(
-        [legend_x, legend_y, legend_x + 230, legend_y + 220], fill=(0, 0, 0, 220)
-    )
-    draw.text(
-        (legend_x + 10, legend_y + 10), "VILLAGE MAP", fill=(255, 255, 255), font=font
-    )
-    draw.text(
-        (legend_x + 10, legend_y + 35),
-        "64x52 tiles (2048x1664 px)",
-        fill=(180, 180, 180),
-        font=small_font,
-    )
-
-    items = [
+        if label is not None:
+            region = pixels[text_y - 6:text_y - 6 + label.height, text_x - 6:text_x - 6 + label.width]
+            region[...] = np.asarray(label)[:region.shape[0], :region.shape[1]]
+        else:
+            img = Image.fromarray(pixels)
+            draw = ImageDraw.Draw(img)
+            draw.rectangle(
+                [text_x - 6, text_y - 6, text_x + text_width + 6, text_y + text_height + 6],
+                fill=(0, 0, 0, 200),
+            )
+            draw.text((text_x, text_y), text, fill=(255, 255, 255), font=font)
+            pixels = np.array(img)
+
+    draw_grid(pixels, (80, 80, 80, 60))
+
+    items = (
         ("Road/Path", (210, 210, 210)),
         ("Grass", (76, 153, 0)),
         ("Plaza Grass", (102, 178, 51)),
@@ -205,13 +203,17 @@ def render_map():
         ("Lounge Zone", zone_colors["lounge-cafe"][:3]),
         ("Arcade Zone", zone_colors["arcade"][:3]),
         ("Plaza Zone", zone_colors["plaza"][:3]),
-    ]
+    )
 
-    for i, (name, color) in enumerate(items):
-        iy = legend_y + 55 + i * 16
-        draw.rectangle([legend_x + 10, iy, legend_x + 25, iy + 12], fill=color)
-        draw.text((legend_x + 35, iy - 2), name, fill=(255, 255, 255), font=small_font)
+    legend_y = 10
+    legend_x = img_width - 240
+    legend = legend_image(items)
+    if legend is not None:
+        pixels[legend_y:legend_y + legend.height, legend_x:legend_x + legend.width] = legend
+        return Image.fromarray(pixels)
 
+    img = Image.fromarray(pixels)
+    draw_legend(ImageDraw.Draw(img), legend_x, legend_y, items)
     return img
 
 
@@ -4,10 +4,15 @@ Visualize roads and zone boundaries from the village map reference image.
 Creates a preview image showing road layout and zone boundaries.
 """
 
-from PIL import Image, ImageDraw, ImageFont
-import json
+import functools
+
+import numpy as np
+from PIL import Image, ImageDraw
 import os
 
+from extract_utils import load_font, write_json
+from generate_road_map import render_label, render_panel, blend_color, draw_outline, draw_grid
+
 MAP_WIDTH = 64
 MAP_HEIGHT = 52
 TILE_SIZE = 16
@@ -46,88 +51,9 @@ ROADS = [
 PLAZA_CENTER = {"x": 20, "y": 20, "width": 20, "height": 11}
 
 
-def create_road_map():
-    img_width = MAP_WIDTH * TILE_SIZE
-    img_height = MAP_HEIGHT * TILE_SIZE
-
-    img = Image.new("RGBA", (img_width, img_height), GRASS_COLOR)
-    draw = ImageDraw.Draw(img)
-
-    for y in range(6):
-        for x in range(MAP_WIDTH):
-            px = x * TILE_SIZE
-            py = y * TILE_SIZE
-            draw.rectangle(
-                [px, py, px + TILE_SIZE - 1, py + TILE_SIZE - 1], fill=WATER_COLOR
-            )
-
-    for x in range(8):
-        for y in range(6, 20):
-            px = x * TILE_SIZE
-            py = y * TILE_SIZE
-            draw.rectangle(
-                [px, py, px + TILE_SIZE - 1, py + TILE_SIZE - 1], fill=WATER_COLOR
-            )
-
-    px = PLAZA_CENTER["x"] * TILE_SIZE
-    py = PLAZA_CENTER["y"] * TILE_SIZE
-    pw = PLAZA_CENTER["width"] * TILE_SIZE
-    ph = PLAZA_CENTER["height"] * TILE_SIZE
-    draw.rectangle([px, py, px + pw - 1, py + ph - 1], fill=ROAD_COLOR)
-
-    for road in ROADS:
-        rx = road["x"] * TILE_SIZE
-        ry = road["y"] * TILE_SIZE
-        rw = road["width"] * TILE_SIZE
-        rh = road["height"] * TILE_SIZE
-        draw.rectangle([rx, ry, rx + rw - 1, ry + rh - 1], fill=ROAD_COLOR)
+def draw_legend(draw, legend_x, legend_y):
+    font = load_font(20)
 
-    for zone_name, bounds in ZONE_BOUNDS.items():
-        zx = bounds["x"] * TILE_SIZE
-        zy = bounds["y"] * TILE_SIZE
-        zw = bounds["width"] * TILE_SIZE
-        zh = bounds["height"] * TILE_SIZE
-
-        overlay = Image.new("RGBA", (zw, zh), ZONE_COLORS[zone_name])
-        img.paste(overlay, (zx, zy), overlay)
-
-        draw.rectangle(
-            [zx, zy, zx + zw - 1, zy + zh - 1], outline=BOUNDARY_COLOR, width=3
-        )
-
-        try:
-            font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 20)
-        except:
-            font = ImageFont.load_default()
-
-        label = zone_name.upper().replace("-", "\n")
-        bbox = draw.textbbox((0, 0), label, font=font)
-        text_width = bbox[2] - bbox[0]
-        text_height = bbox[3] - bbox[1]
-        text_x = zx + (zw - text_width) // 2
-        text_y = zy + (zh - text_height) // 2
-
-        draw.rectangle(
-            [text_x - 5, text_y - 5, text_x + text_width + 5, text_y + text_height + 5],
-            fill=(255, 255, 255, 200),
-        )
-        draw.text((text_x, text_y), label, fill=(0, 0, 0, 255), font=font)
-
-    for y in range(MAP_HEIGHT + 1):
-        draw.line(
-            [(0, y * TILE_SIZE), (img_width, y * TILE_SIZE)],
-            fill=(100, 100, 100, 100),
-            width=1,
-        )
-    for x in range(MAP_WIDTH + 1):
-        draw.line(
-            [(x * TILE_SIZE, 0), (x * TILE_SIZE, img_height)],
-            fill=(100, 100, 100, 100),
-            width=1,
-        )
-
-    legend_x = 10
-    legend_y = img_height - 150
     draw.rectangle(
         [legend_x, legend_y, legend_x + 200, legend_y + 140], fill=(255, 255, 255, 220)
     )
@@ -153,6 +79,73 @@ def create_road_map():
         (legend_x + 40, legend_y + 110), "Zone Boundary", fill=(0, 0, 0), font=font
     )
 
+
+@functools.lru_cache(maxsize=1)
+def legend_image():
+    """Rasterize the legend once, or None if it must be drawn in place."""
+    return render_panel(201, 141, draw_legend)
+
+
+def create_road_map():
+    img_width = MAP_WIDTH * TILE_SIZE
+    img_height = MAP_HEIGHT * TILE_SIZE
+
+    # Everything up to the legend is filled into one canvas array; only the
+    # legend goes through ImageDraw
+    canvas = np.empty((img_height, img_width, 4), dtype=np.uint8)
+    canvas[:] = GRASS_COLOR
+    canvas[:6 * TILE_SIZE, :] = WATER_COLOR
+    canvas[6 * TILE_SIZE:20 * TILE_SIZE, :8 * TILE_SIZE] = WATER_COLOR
+
+    for rect in [PLAZA_CENTER, *ROADS]:
+        rx = rect["x"] * TILE_SIZE
+        ry = rect["y"] * TILE_SIZE
+        rw = rect["width"] * TILE_SIZE
+        rh = rect["height"] * TILE_SIZE
+        canvas[ry:ry + rh, rx:rx + rw] = ROAD_COLOR
+
+    # Each zone's overlay, outline and label go straight into the canvas in
+    # zone order; zones overlap, so a later overlay tints earlier outlines
+    font = load_font(20)
+
+    for zone_name, bounds in ZONE_BOUNDS.items():
+        zx = bounds["x"] * TILE_SIZE
+        zy = bounds["y"] * TILE_SIZE
+        zw = bounds["width"] * TILE_SIZE
+        zh = bounds["height"] * TILE_SIZE
+
+        blend_color(canvas, np.s_[zy:zy + zh, zx:zx + zw], ZONE_COLORS[zone_name])
+        draw_outline(canvas, zx, zy, zx + zw - 1, zy + zh - 1, 3, BOUNDARY_COLOR)
+
+        text = zone_name.upper().replace("-", "\n")
+        label, text_width, text_height = render_label(text, font, 5, (255, 255, 255, 200), (0, 0, 0, 255))
+        text_x = zx + (zw - text_width) // 2
+        text_y = zy + (zh - text_height) // 2
+
+        if label is not None:
+            region = canvas[text_y - 5:text_y - 5 + label.height, text_x - 5:text_x - 5 + label.width]
+            region[...] = np.asarray(label)[:region.shape[0], :region.shape[1]]
+        else:
+            img = Image.fromarray(canvas)
+            draw = ImageDraw.Draw(img)
+            draw.rectangle(
+                [text_x - 5, text_y - 5, text_x + text_width + 5, text_y + text_height + 5],
+                fill=(255, 255, 255, 200),
+            )
+            draw.text((text_x, text_y), text, fill=(0, 0, 0, 255), font=font)
+            canvas = np.array(img)
+
+    draw_grid(canvas, (100, 100, 100, 100))
+
+    legend_x = 10
+    legend_y = img_height - 150
+    legend = legend_image()
+    if legend is not None:
+        canvas[legend_y:legend_y + legend.height, legend_x:legend_x + legend.width] = legend
+        return Image.fromarray(canvas)
+
+    img = Image.fromarray(canvas)
+    draw_legend(ImageDraw.Draw(img), legend_x, legend_y)
     return img
 
 
@@ -171,8 +164,7 @@ def main():
         "plaza_center": PLAZA_CENTER,
     }
 
-    with open(f"{output_dir}/road_data.json", "w") as f:
-        json.dump(road_data, f, indent=2)
+    write_json(f"{output_dir}/road_data.json", road_data)
     print(f"Road data saved to {output_dir}/road_data.json")
 
 